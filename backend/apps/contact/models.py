@@ -41,6 +41,9 @@ class ContactMessage(models.Model):
     class Meta:
         db_table = 'contact_messages'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='contact_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.subject} - {self.email}"
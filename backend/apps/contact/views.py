@@ -12,6 +12,7 @@ from .serializers import (
     ContactMessageReplySerializer,
 )
 from apps.users.permissions import IsAdmin
+from config.pagination import OptInKeysetPagination
 
 
 class ContactMessageCreateView(generics.CreateAPIView):
@@ -32,6 +33,8 @@ class ContactMessageListView(generics.ListAPIView):
     filterset_fields = ['status']
     search_fields = ['name', 'email', 'subject', 'message']
     ordering_fields = ['created_at', 'status']
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ['-created_at']
 
 
 class ContactMessageDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import WorkoutHistory, ExerciseCompletion, UserStreak
+from config.pagination import EstimatedCountPaginator
 
 
 class ExerciseCompletionInline(admin.TabularInline):
@@ -13,6 +14,8 @@ class WorkoutHistoryAdmin(admin.ModelAdmin):
     list_filter = ['completed_at', 'program']
     search_fields = ['user__name', 'user__email']
     inlines = [ExerciseCompletionInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(UserStreak)
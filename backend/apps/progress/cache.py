@@ -0,0 +1,44 @@
+"""
+Per-user cache for progress stats.
+
+Each user has a version token in the cache and stats are stored under a key
+that includes it, so bumping the token makes the cached stats unreachable.
+The signals in signals.py bump it when a workout is completed; bulk
+enrollment writes, which send no signals, call bump_user_versions().
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _version_key(user_id):
+    return f'progress:user:{user_id}:version'
+
+
+def get_user_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def bump_user_version(user_id):
+    cache.set(_version_key(user_id), uuid.uuid4().hex, None)
+
+
+def bump_user_versions(user_ids):
+    cache.set_many({_version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
+
+
+def get_or_build_stats(user_id, name, build):
+    """Return the cached stats `name` for a user, building them on a miss."""
+    key = f'progress:user:{user_id}:{name}:{get_user_version(user_id)}'
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.STATS_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0001_initial'),
+        ('workouts', '0005_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workouthistory',
+            index=models.Index(fields=['user', '-completed_at', '-id'], name='history_user_completed_idx'),
+        ),
+    ]
@@ -30,6 +30,9 @@ class WorkoutHistory(models.Model):
     class Meta:
         db_table = 'workout_history'
         ordering = ['-completed_at']
+        indexes = [
+            models.Index(fields=['user', '-completed_at', '-id'], name='history_user_completed_idx'),
+        ]
         verbose_name_plural = 'Workout histories'
 
     def __str__(self):
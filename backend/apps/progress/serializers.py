@@ -1,9 +1,12 @@
 from rest_framework import serializers
+from config.fieldsets import SparseFieldsetMixin
 from .models import WorkoutHistory, ExerciseCompletion, UserStreak
+from apps.workouts.models import ProgramDay, UserEnrollment
 from apps.workouts.serializers import ExerciseListSerializer
+from apps.workouts.versions import version_day_slot
 
 
-class ExerciseCompletionSerializer(serializers.ModelSerializer):
+class ExerciseCompletionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     exercise_name = serializers.CharField(source='exercise.name', read_only=True)
 
     class Meta:
@@ -14,7 +17,7 @@ class ExerciseCompletionSerializer(serializers.ModelSerializer):
         ]
 
 
-class WorkoutHistorySerializer(serializers.ModelSerializer):
+class WorkoutHistorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     exercise_completions = ExerciseCompletionSerializer(many=True, read_only=True)
     program_name = serializers.CharField(source='program.name', read_only=True)
     day_name = serializers.CharField(source='day.day_name', read_only=True)
@@ -29,7 +32,25 @@ class WorkoutHistorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'completed_at']
 
 
+def resumable_enrollment(user, program):
+    """
+    The user's enrollment in `program` that a completion advances: the
+    active one, or else a paused one, which the completion resumes.
+    """
+    return UserEnrollment.objects.filter(
+        user=user,
+        program=program,
+        status__in=['active', 'paused']
+    ).select_related('program_version').defer('program_version__document').order_by(
+        # 'active' sorts before 'paused'
+        'status', '-updated_at'
+    ).first()
+
+
 class WorkoutHistoryCreateSerializer(serializers.ModelSerializer):
+    # Resolved in validate(): clients send day ids from pinned versions,
+    # whose days may no longer exist
+    day = serializers.UUIDField(required=False, allow_null=True)
     exercise_completions = serializers.ListField(
         child=serializers.DictField(),
         write_only=True,
@@ -43,6 +64,36 @@ class WorkoutHistoryCreateSerializer(serializers.ModelSerializer):
             'calories_burned', 'notes', 'exercise_completions'
         ]
 
+    def validate(self, attrs):
+        # (week_number, day_number) of the completed day, if one was given
+        self.day_slot = None
+        day_id = attrs.pop('day', None)
+        if day_id is not None:
+            attrs['day'], self.day_slot = self._resolve_day(attrs.get('program'), day_id)
+        return attrs
+
+    def _resolve_day(self, program, day_id):
+        """
+        Find the completed day by its slot in the version the enrollment is
+        pinned to, falling back to the stored day with that id.
+        """
+        if program is not None:
+            enrollment = resumable_enrollment(self.context['request'].user, program)
+            if enrollment and enrollment.program_version_id:
+                slot = version_day_slot(enrollment.program_version, day_id)
+                if slot is not None:
+                    day = ProgramDay.objects.filter(
+                        program=program, week_number=slot[0], day_number=slot[1]
+                    ).first()
+                    return day, slot
+
+        day = ProgramDay.objects.filter(pk=day_id).first()
+        if day is None:
+            raise serializers.ValidationError({
+                'day': [f'Invalid pk "{day_id}" - object does not exist.']
+            })
+        return day, (day.week_number, day.day_number)
+
     def create(self, validated_data):
         exercise_completions_data = validated_data.pop('exercise_completions', [])
         history = WorkoutHistory.objects.create(
@@ -0,0 +1,16 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.workouts.models import UserEnrollment
+from .cache import bump_user_version
+from .models import WorkoutHistory, UserStreak
+
+
+@receiver([post_save, post_delete], sender=WorkoutHistory)
+@receiver([post_save, post_delete], sender=UserStreak)
+@receiver([post_save, post_delete], sender=UserEnrollment)
+def invalidate_user_stats(sender, instance, **kwargs):
+    transaction.on_commit(partial(bump_user_version, instance.user_id))
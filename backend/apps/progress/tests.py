@@ -0,0 +1,166 @@
+from datetime import date, timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.workouts.maintenance import run_enrollment_maintenance
+from apps.workouts.models import ProgramDay, UserEnrollment
+from apps.workouts.tests import ProgramTestCase
+from .models import WorkoutHistory
+
+
+class CompleteWorkoutTests(ProgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.enrollment = self.enroll()
+        # Serving today's workout pins the enrollment to the current version
+        self.today = self.customer_client.get(reverse('today-workout')).data
+
+    def complete(self, day_id):
+        return self.customer_client.post(reverse('complete-workout'), {
+            'program': str(self.program.pk),
+            'day': day_id,
+            'duration_minutes': 30,
+        }, format='json')
+
+    def patch_days(self, days):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.admin_client.patch(
+                reverse('program-detail', args=[self.program.pk]), {'days': days}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def remaining_days(self, skip):
+        return [
+            {'id': str(day.pk), 'week_number': day.week_number,
+             'day_number': day.day_number, 'day_name': day.day_name}
+            for day in self.program.days.all() if (day.week_number, day.day_number) != skip
+        ]
+
+    def test_completes_pinned_day_deleted_from_program(self):
+        self.patch_days(self.remaining_days(skip=(1, 1)))
+
+        response = self.complete(self.today['day']['id'])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(WorkoutHistory.objects.get().day)
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.current_week, self.enrollment.current_day), (1, 2))
+
+    def test_completes_pinned_day_recreated_in_its_slot(self):
+        self.patch_days(self.remaining_days(skip=(1, 1)))
+        self.patch_days([
+            *self.remaining_days(skip=None),
+            {'week_number': 1, 'day_number': 1, 'day_name': 'Recreated'},
+        ])
+        recreated = ProgramDay.objects.get(program=self.program, week_number=1, day_number=1)
+        self.assertNotEqual(str(recreated.pk), self.today['day']['id'])
+
+        response = self.complete(self.today['day']['id'])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(WorkoutHistory.objects.get().day, recreated)
+
+    def test_completion_resumes_a_paused_enrollment(self):
+        UserEnrollment.objects.filter(pk=self.enrollment.pk).update(
+            start_date=date.today() - timedelta(days=30)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            report = run_enrollment_maintenance(stale_days=14, expire_days=90)
+        self.assertEqual(report['paused'], 1)
+
+        response = self.complete(self.today['day']['id'])
+
+        self.assertEqual(response.status_code, 201)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.status, 'active')
+        self.assertEqual((self.enrollment.current_week, self.enrollment.current_day), (1, 2))
+
+    def test_rejects_unknown_day(self):
+        response = self.complete(str(self.program.pk))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('day', response.data)
+
+
+class UserStatsCacheTests(ProgramTestCase):
+    def stats(self):
+        return self.customer_client.get(reverse('user-stats')).data
+
+    def complete_first_day(self):
+        day = self.program.days.get(week_number=1, day_number=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.customer_client.post(reverse('complete-workout'), {
+                'program': str(self.program.pk),
+                'day': str(day.pk),
+                'duration_minutes': 40,
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_completion_invalidates_stats(self):
+        self.enroll()
+        self.assertEqual(self.stats()['total_workouts'], 0)
+
+        self.complete_first_day()
+
+        stats = self.stats()
+        self.assertEqual(stats['total_workouts'], 1)
+        self.assertEqual(stats['total_duration_minutes'], 40)
+        self.assertEqual(stats['current_streak'], 1)
+        self.assertEqual(stats['completion_percentage'], 25.0)
+
+    def test_cohort_enrollment_invalidates_stats(self):
+        self.complete_first_day()
+        self.assertEqual(self.stats()['completion_percentage'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_client.post(
+                reverse('program-enroll-cohort', args=[self.program.pk]),
+                {'user_ids': [str(self.customer.pk)]}, format='json'
+            )
+
+        self.assertEqual(self.stats()['completion_percentage'], 25.0)
+
+    def test_maintenance_invalidates_stats(self):
+        enrollment = self.enroll()
+        self.complete_first_day()
+        self.assertEqual(self.stats()['completion_percentage'], 25.0)
+        # Past the last week without saving, as an import would leave it
+        UserEnrollment.objects.filter(pk=enrollment.pk).update(current_week=3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report = run_enrollment_maintenance(stale_days=14, expire_days=90)
+
+        self.assertEqual(report['completed'], 1)
+        self.assertEqual(self.stats()['completion_percentage'], 0)
+
+
+class WorkoutHistoryKeysetTests(ProgramTestCase):
+    def add_history(self, completed_at):
+        history = WorkoutHistory.objects.create(user=self.customer, program=self.program)
+        # completed_at is auto_now_add
+        WorkoutHistory.objects.filter(pk=history.pk).update(completed_at=completed_at)
+        return history.pk
+
+    def test_cursor_pages_are_stable_across_inserts(self):
+        now = timezone.now()
+        # Two rows share a timestamp so the id tiebreaker is exercised
+        expected = [
+            self.add_history(now - timedelta(hours=hours)) for hours in (1, 2, 2, 3, 4)
+        ]
+        url = reverse('workout-history')
+
+        seen = []
+        response = self.customer_client.get(url, {'cursor': '', 'page_size': 2})
+        seen += [row['id'] for row in response.data['results']]
+        # Newer rows land before the cursor and must not shift later pages
+        self.add_history(now)
+        while response.data['next']:
+            response = self.customer_client.get(response.data['next'])
+            seen += [row['id'] for row in response.data['results']]
+
+        ordered = WorkoutHistory.objects.filter(pk__in=expected).order_by(
+            '-completed_at', '-id'
+        ).values_list('pk', flat=True)
+        self.assertEqual(seen, [str(pk) for pk in ordered])
+        self.assertNotIn('count', response.data)
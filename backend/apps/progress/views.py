@@ -3,26 +3,36 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from django.db.models import Sum, Avg, Count
+from django.db.models import Sum, Avg, Count, Q
 from datetime import timedelta
 
+from .cache import get_or_build_stats
 from .models import WorkoutHistory, ExerciseCompletion, UserStreak
 from .serializers import (
     WorkoutHistorySerializer,
     WorkoutHistoryCreateSerializer,
     UserStreakSerializer,
     UserStatsSerializer,
+    resumable_enrollment,
 )
 from apps.workouts.models import UserEnrollment
+from apps.workouts.versions import version_header
 from apps.users.permissions import IsAdmin
+from config.fieldsets import SparseQuerysetMixin
+from config.pagination import OptInKeysetPagination
 
 
-class WorkoutHistoryListView(generics.ListAPIView):
+class WorkoutHistoryListView(SparseQuerysetMixin, generics.ListAPIView):
     serializer_class = WorkoutHistorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ['-completed_at']
 
     def get_queryset(self):
-        return WorkoutHistory.objects.filter(user=self.request.user)
+        # ?fields= / ?omit= drop the relations that are not rendered
+        return WorkoutHistory.objects.filter(user=self.request.user).select_related(
+            'program', 'day'
+        ).prefetch_related('exercise_completions__exercise')
 
 
 class CompleteWorkoutView(APIView):
@@ -41,7 +51,7 @@ class CompleteWorkoutView(APIView):
             self._update_streak(request.user)
 
             # Update enrollment progress if applicable
-            self._update_enrollment_progress(request.user, history)
+            self._update_enrollment_progress(request.user, history, serializer.day_slot)
 
             return Response(
                 WorkoutHistorySerializer(history).data,
@@ -73,26 +83,36 @@ class CompleteWorkoutView(APIView):
             streak.longest_streak = streak.current_streak
         streak.save()
 
-    def _update_enrollment_progress(self, user, history):
-        if not history.program or not history.day:
+    def _update_enrollment_progress(self, user, history, day_slot):
+        # The day may be gone from the live program while still part of the
+        # pinned version, so a resolved slot is enough to advance
+        if not history.program or day_slot is None:
             return
 
-        enrollment = UserEnrollment.objects.filter(
-            user=user,
-            program=history.program,
-            status='active'
-        ).first()
+        enrollment = resumable_enrollment(user, history.program)
 
         if enrollment:
+            # Working out again resumes an enrollment that maintenance paused
+            enrollment.status = 'active'
+
+            # Progress through the program version the enrollment is pinned to
+            if enrollment.program_version_id:
+                program = version_header(enrollment.program_version)
+                days_per_week = program['days_per_week']
+                duration_weeks = program['duration_weeks']
+            else:
+                days_per_week = history.program.days_per_week
+                duration_weeks = history.program.duration_weeks
+
             # Move to next day
             next_day = enrollment.current_day + 1
             next_week = enrollment.current_week
 
-            if next_day > enrollment.program.days_per_week:
+            if next_day > days_per_week:
                 next_day = 1
                 next_week += 1
 
-            if next_week > enrollment.program.duration_weeks:
+            if next_week > duration_weeks:
                 enrollment.status = 'completed'
             else:
                 enrollment.current_day = next_day
@@ -107,53 +127,62 @@ class UserStatsView(APIView):
     def get(self, request):
         user = request.user
         today = timezone.now().date()
+        # The week and month windows move with the date
+        data = get_or_build_stats(
+            user.pk, f'stats:{today.isoformat()}', lambda: self._build_stats(user, today)
+        )
+        return Response(data)
+
+    def _build_stats(self, user, today):
         week_start = today - timedelta(days=today.weekday())
         month_start = today.replace(day=1)
 
-        # Get workout history stats
-        history = WorkoutHistory.objects.filter(user=user)
-
-        total_workouts = history.count()
-        workouts_this_week = history.filter(completed_at__date__gte=week_start).count()
-        workouts_this_month = history.filter(completed_at__date__gte=month_start).count()
-
-        # Duration stats
-        duration_stats = history.aggregate(
-            total_duration=Sum('duration_minutes'),
-            avg_duration=Avg('duration_minutes')
-        )
+        enrollment = UserEnrollment.objects.filter(
+            user=user, status='active'
+        ).select_related('program', 'program_version').defer('program_version__document').first()
+
+        # All history stats in one pass over the user's workouts
+        aggregates = {
+            'total_workouts': Count('pk'),
+            'workouts_this_week': Count('pk', filter=Q(completed_at__date__gte=week_start)),
+            'workouts_this_month': Count('pk', filter=Q(completed_at__date__gte=month_start)),
+            'total_duration': Sum('duration_minutes'),
+            'avg_duration': Avg('duration_minutes'),
+        }
+        if enrollment:
+            aggregates['program_workouts'] = Count(
+                'pk', filter=Q(program_id=enrollment.program_id)
+            )
+        history = WorkoutHistory.objects.filter(user=user).aggregate(**aggregates)
 
         # Streak info
-        try:
-            streak = UserStreak.objects.get(user=user)
-            current_streak = streak.current_streak
-            longest_streak = streak.longest_streak
-        except UserStreak.DoesNotExist:
-            current_streak = 0
-            longest_streak = 0
+        streak = UserStreak.objects.filter(user=user).values(
+            'current_streak', 'longest_streak'
+        ).first() or {'current_streak': 0, 'longest_streak': 0}
 
         # Completion percentage (for current program)
         completion_percentage = 0
-        enrollment = UserEnrollment.objects.filter(user=user, status='active').first()
         if enrollment:
-            total_days = enrollment.program.duration_weeks * enrollment.program.days_per_week
-            completed_days = history.filter(program=enrollment.program).count()
+            # Measured against the program version the enrollment is pinned to
+            if enrollment.program_version_id:
+                program = version_header(enrollment.program_version)
+                total_days = program['duration_weeks'] * program['days_per_week']
+            else:
+                total_days = enrollment.program.duration_weeks * enrollment.program.days_per_week
             if total_days > 0:
-                completion_percentage = (completed_days / total_days) * 100
-
-        stats = {
-            'total_workouts': total_workouts,
-            'workouts_this_week': workouts_this_week,
-            'workouts_this_month': workouts_this_month,
-            'current_streak': current_streak,
-            'longest_streak': longest_streak,
-            'total_duration_minutes': duration_stats['total_duration'] or 0,
-            'avg_workout_duration': round(duration_stats['avg_duration'] or 0, 1),
+                completion_percentage = (history['program_workouts'] / total_days) * 100
+
+        return {
+            'total_workouts': history['total_workouts'],
+            'workouts_this_week': history['workouts_this_week'],
+            'workouts_this_month': history['workouts_this_month'],
+            'current_streak': streak['current_streak'],
+            'longest_streak': streak['longest_streak'],
+            'total_duration_minutes': history['total_duration'] or 0,
+            'avg_workout_duration': round(history['avg_duration'] or 0, 1),
             'completion_percentage': round(completion_percentage, 1),
         }
 
-        return Response(stats)
-
 
 class UserStreakView(generics.RetrieveAPIView):
     serializer_class = UserStreakSerializer
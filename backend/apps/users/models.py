@@ -225,6 +225,10 @@ class User(AbstractBaseUser, PermissionsMixin):
         """
         db_table = 'users'          # Custom table name (default would be 'users_user')
         ordering = ['-created_at']  # Default ordering: newest first
+        # Supports keyset pagination of the admin user list
+        indexes = [
+            models.Index(fields=['role', '-created_at', '-id'], name='users_role_created_idx'),
+        ]
 
     def __str__(self):
         """String representation shown in admin and debugging"""
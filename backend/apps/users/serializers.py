@@ -25,6 +25,7 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from .models import User
+from config.fieldsets import SparseFieldsetMixin
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -206,7 +207,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'email', 'role', 'created_at', 'last_login']
 
 
-class UserAdminSerializer(serializers.ModelSerializer):
+class UserAdminSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for admin operations on users.
 
@@ -214,6 +215,9 @@ class UserAdminSerializer(serializers.ModelSerializer):
     allowing admins to modify more fields (like role and is_active).
 
     Used by admin views for user management (list, update, delete users).
+
+    SparseFieldsetMixin lets GET requests pick fields:
+    ?fields=id,name,email or ?omit=last_login
     """
 
     class Meta:
@@ -45,6 +45,8 @@ from .serializers import (
     ResetPasswordSerializer,
 )
 from .permissions import IsAdmin
+from config.fieldsets import SparseQuerysetMixin
+from config.pagination import OptInKeysetPagination
 
 
 # ============================================================
@@ -388,7 +390,7 @@ class ProfileView(generics.RetrieveUpdateDestroyAPIView):
 # For admins to manage all users in the system
 # ============================================================
 
-class UserListView(generics.ListAPIView):
+class UserListView(SparseQuerysetMixin, generics.ListAPIView):
     """
     List all customers for admin (GET /api/admin/users/).
 
@@ -400,6 +402,7 @@ class UserListView(generics.ListAPIView):
     - Only shows customers (not admins)
     - Supports filtering by is_active, gender, fitness_goal, experience_level
     - Supports search by name and email
+    - Supports ?fields= / ?omit= (only the requested columns are selected)
     """
 
     # Only get customers, not admins
@@ -422,6 +425,11 @@ class UserListView(generics.ListAPIView):
     # Example: /api/admin/users/?search=john
     search_fields = ['name', 'email']
 
+    # Page numbers by default; ?cursor= switches to keyset pagination
+    # (newest first, no COUNT(*) unless ?count=true is passed)
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ['-created_at']
+
 
 class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Exercise, WorkoutProgram, ProgramDay, DayExercise, UserEnrollment
+from config.pagination import EstimatedCountPaginator
 
 
 @admin.register(Exercise)
@@ -39,3 +40,6 @@ class UserEnrollmentAdmin(admin.ModelAdmin):
     list_display = ['user', 'program', 'status', 'start_date', 'current_week', 'current_day']
     list_filter = ['status', 'program']
     search_fields = ['user__name', 'user__email']
+    readonly_fields = ['program_version']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,88 @@
+"""
+Versioned cache for serialized program documents and catalog lookups.
+
+Each program has a version token stored in the cache, and the catalog as a
+whole has one more. Documents are stored under a key that includes the
+token, so bumping the version (done by the signals in signals.py) makes
+every older document unreachable without having to find and delete it.
+
+Program versions (see versions.py) never change, so their documents are
+keyed by content hash and cached without a timeout.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+CATALOG_VERSION_KEY = 'workouts:catalog:version'
+
+
+def _version_key(program_id):
+    return f'workouts:program:{program_id}:version'
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # A fresh random token avoids reusing documents cached under an
+        # evicted version
+        version = uuid.uuid4().hex
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def get_program_version(program_id):
+    return _get_version(_version_key(program_id))
+
+
+def bump_program_version(program_id):
+    cache.set(_version_key(program_id), uuid.uuid4().hex, None)
+
+
+def get_catalog_version():
+    return _get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    cache.set(CATALOG_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def program_cache_key(program_id, name):
+    return f'workouts:program:{program_id}:{name}:{get_program_version(program_id)}'
+
+
+def get_or_build(program_id, name, build):
+    """Return the cached document `name` for a program, building it on a miss."""
+    key = program_cache_key(program_id, name)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.PROGRAM_CACHE_TIMEOUT)
+    return data
+
+
+def get_or_build_catalog(name, params, build):
+    """Return a cached catalog lookup for the given query params."""
+    digest = hashlib.md5(repr(sorted(params)).encode(), usedforsecurity=False).hexdigest()
+    key = f'workouts:catalog:{name}:{get_catalog_version()}:{digest}'
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.PROGRAM_CACHE_TIMEOUT)
+    return data
+
+
+def get_or_build_document(content_hash, name, build, timeout=None):
+    """
+    Return a cached part of an immutable program version document. Parts
+    that also depend on something else pass a `timeout`.
+    """
+    key = f'workouts:document:{content_hash}:{name}'
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout)
+    return data
@@ -0,0 +1,363 @@
+"""
+Versioned catalog packs: bulk upserts of exercises and programs.
+
+A pack is a JSON object
+
+    {"version": "2026.10", "exercises": [...], "programs": [...]}
+
+or the same content as NDJSON, one object per line with a "type" of
+"pack" (carrying the version), "exercise" or "program". Exercises and
+programs are matched to existing rows by name. Programs refer to their
+exercises by name too, and a program's days are diffed in place (see
+tree.py) when they differ from what is stored, so unchanged days keep
+their ids.
+"""
+import hashlib
+import json
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .models import (
+    Exercise, WorkoutProgram, ProgramDay, DayExercise, CatalogPackImport
+)
+from .serializers import ExerciseSerializer, CatalogProgramSerializer
+from .signals import defer_program_touches
+from .suggest import exercise_index
+from .tree import apply_program_days
+
+
+DAY_DEFAULTS = {
+    'description': '',
+    'is_rest_day': False,
+}
+DAY_EXERCISE_DEFAULTS = {
+    'custom_sets': None,
+    'custom_reps': '',
+    'custom_rest_time': None,
+    'notes': '',
+}
+
+
+class CatalogPackError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def parse_pack(text):
+    """Parse a pack from JSON or NDJSON text."""
+    try:
+        pack = json.loads(text)
+    except ValueError:
+        pack = None
+
+    if isinstance(pack, dict):
+        return pack
+    if isinstance(pack, list):
+        return {'exercises': pack}
+
+    pack = {'exercises': [], 'programs': []}
+    for line_number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            raise CatalogPackError({'line': [f'Line {line_number} is not valid JSON.']})
+        if not isinstance(item, dict):
+            raise CatalogPackError({'line': [f'Line {line_number} is not an object.']})
+
+        item_type = item.pop('type', 'exercise')
+        if item_type == 'pack':
+            pack.update(item)
+        elif item_type in ('exercise', 'program'):
+            pack[f'{item_type}s'].append(item)
+        else:
+            raise CatalogPackError({'line': [f'Line {line_number} has unknown type "{item_type}".']})
+    return pack
+
+
+def _checksum(pack):
+    canonical = json.dumps(pack, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _validate_items(items, serializer_class, label):
+    errors = {}
+    validated = []
+    names = set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = {'non_field_errors': [f'Each {label} must be an object.']}
+            continue
+        serializer = serializer_class(data=item)
+        if not serializer.is_valid():
+            errors[index] = serializer.errors
+            continue
+        name = serializer.validated_data['name']
+        if name in names:
+            errors[index] = {'name': [f'Duplicate {label} name in this pack.']}
+        names.add(name)
+        validated.append(serializer.validated_data)
+    return validated, errors
+
+
+def _existing_by_name(queryset, names):
+    # Older rows win when the library already holds duplicate names
+    existing = {}
+    for obj in queryset.filter(name__in=names).order_by('-created_at'):
+        existing[obj.name] = obj
+    return existing
+
+
+def _diff(items, existing, model, exclude=()):
+    """Split validated items into new instances and changed instances."""
+    created, updated, update_fields = [], [], set()
+    unchanged = 0
+    for item in items:
+        fields = {key: value for key, value in item.items() if key not in exclude}
+        instance = existing.get(item['name'])
+        if instance is None:
+            created.append(model(**fields))
+            continue
+        changed = [key for key, value in fields.items() if getattr(instance, key) != value]
+        if changed:
+            for key in changed:
+                setattr(instance, key, fields[key])
+            update_fields.update(changed)
+            updated.append(instance)
+        else:
+            unchanged += 1
+    return created, updated, update_fields, unchanged
+
+
+def _day_key(days):
+    """Comparable form of a program schedule, with exercises by name."""
+    key = []
+    for day in days:
+        exercises = [
+            {**DAY_EXERCISE_DEFAULTS, 'order_index': index, **exercise}
+            for index, exercise in enumerate(day.get('exercises', []))
+        ]
+        key.append((
+            day['week_number'], day['day_number'], day['day_name'],
+            day.get('description', ''), day.get('is_rest_day', False),
+            tuple(sorted(
+                (
+                    e['order_index'], e['exercise'], e['custom_sets'],
+                    e['custom_reps'], e['custom_rest_time'], e['notes']
+                )
+                for e in exercises
+            )),
+        ))
+    return sorted(key)
+
+
+def _stored_days(programs):
+    days = ProgramDay.objects.filter(program__in=programs).prefetch_related(
+        Prefetch('exercises', queryset=DayExercise.objects.select_related('exercise'))
+    )
+    stored = {program.pk: [] for program in programs}
+    for day in days:
+        stored[day.program_id].append({
+            'week_number': day.week_number,
+            'day_number': day.day_number,
+            'day_name': day.day_name,
+            'description': day.description,
+            'is_rest_day': day.is_rest_day,
+            'exercises': [
+                {
+                    'exercise': day_exercise.exercise.name,
+                    'order_index': day_exercise.order_index,
+                    'custom_sets': day_exercise.custom_sets,
+                    'custom_reps': day_exercise.custom_reps,
+                    'custom_rest_time': day_exercise.custom_rest_time,
+                    'notes': day_exercise.notes,
+                }
+                for day_exercise in day.exercises.all()
+            ],
+        })
+    return stored
+
+
+def _tree_days(days, exercises_by_name):
+    """Pack days in the form apply_program_days() takes, with every field set."""
+    tree = []
+    for day_data in days:
+        exercises = []
+        for exercise_data in day_data.get('exercises', []):
+            fields = {**DAY_EXERCISE_DEFAULTS, **exercise_data}
+            fields['exercise_id'] = exercises_by_name[fields.pop('exercise')].pk
+            exercises.append(fields)
+        tree.append({**DAY_DEFAULTS, **day_data, 'exercises': exercises})
+    return tree
+
+
+def _build_days(program, days, exercises_by_name):
+    day_rows, day_exercise_rows = [], []
+    for day_data in days:
+        day_fields = {key: value for key, value in day_data.items() if key != 'exercises'}
+        day = ProgramDay(program=program, **day_fields)
+        day_rows.append(day)
+        for index, exercise_data in enumerate(day_data.get('exercises', [])):
+            fields = {'order_index': index, **exercise_data}
+            name = fields.pop('exercise')
+            day_exercise_rows.append(
+                DayExercise(day=day, exercise=exercises_by_name[name], **fields)
+            )
+    return day_rows, day_exercise_rows
+
+
+def apply_pack(pack, dry_run=False, chunk_size=500, user=None):
+    """
+    Diff a pack against the library and apply it in one transaction.
+
+    Returns inserted/updated/unchanged counts for exercises and programs.
+    Raises CatalogPackError with per-item errors if anything is invalid.
+    """
+    version = str(pack.get('version') or '').strip()
+    if not version:
+        raise CatalogPackError({'version': ['A pack version is required.']})
+    for key in ('exercises', 'programs'):
+        if not isinstance(pack.get(key, []), list):
+            raise CatalogPackError({key: ['Expected a list.']})
+    checksum = _checksum(pack)
+    previous = CatalogPackImport.objects.filter(version=version).first()
+    if previous and previous.checksum != checksum:
+        raise CatalogPackError({
+            'version': [f'Version {version} was already applied with different content.']
+        })
+
+    exercise_items, exercise_errors = _validate_items(
+        pack.get('exercises', []), ExerciseSerializer, 'exercise'
+    )
+    program_items, program_errors = _validate_items(
+        pack.get('programs', []), CatalogProgramSerializer, 'program'
+    )
+
+    existing_exercises = _existing_by_name(
+        Exercise.objects.defer('search_vector'), [item['name'] for item in exercise_items]
+    )
+    new_exercises, changed_exercises, exercise_fields, unchanged_exercises = _diff(
+        exercise_items, existing_exercises, Exercise
+    )
+
+    # Every exercise a program refers to must be in the library or the pack
+    referenced = {
+        exercise['exercise']
+        for program in program_items
+        for day in program.get('days', [])
+        for exercise in day.get('exercises', [])
+    }
+    exercises_by_name = _existing_by_name(
+        Exercise.objects.only('id', 'name', 'created_at'), referenced
+    )
+    exercises_by_name.update(existing_exercises)
+    exercises_by_name.update({exercise.name: exercise for exercise in new_exercises})
+    for index, item in enumerate(pack.get('programs', [])):
+        if index in program_errors or not isinstance(item, dict):
+            continue
+        missing = sorted({
+            exercise.get('exercise')
+            for day in item.get('days', [])
+            for exercise in day.get('exercises', [])
+            if exercise.get('exercise') not in exercises_by_name
+        })
+        if missing:
+            program_errors[index] = {'days': [f'Unknown exercises: {", ".join(missing)}.']}
+
+    if exercise_errors or program_errors:
+        errors = {}
+        if exercise_errors:
+            errors['exercises'] = exercise_errors
+        if program_errors:
+            errors['programs'] = program_errors
+        raise CatalogPackError(errors)
+
+    existing_programs = _existing_by_name(
+        WorkoutProgram.objects.defer('search_vector'), [item['name'] for item in program_items]
+    )
+    new_programs, changed_programs, program_fields, _ = _diff(
+        program_items, existing_programs, WorkoutProgram, exclude=('days',)
+    )
+    stored_days = _stored_days(list(existing_programs.values()))
+    reschedule = [
+        existing_programs[item['name']]
+        for item in program_items
+        if 'days' in item and item['name'] in existing_programs
+        and _day_key(item['days']) != _day_key(stored_days[existing_programs[item['name']].pk])
+    ]
+    changed_program_ids = {program.pk for program in changed_programs + reschedule}
+
+    report = {
+        'version': version,
+        'dry_run': dry_run,
+        'exercises': {
+            'inserted': len(new_exercises),
+            'updated': len(changed_exercises),
+            'unchanged': unchanged_exercises,
+        },
+        'programs': {
+            'inserted': len(new_programs),
+            'updated': len(changed_program_ids),
+            'unchanged': len(existing_programs) - len(changed_program_ids),
+        },
+    }
+    if dry_run:
+        return report
+
+    with transaction.atomic(), defer_program_touches() as touched:
+        Exercise.objects.bulk_create(new_exercises, batch_size=chunk_size)
+        if changed_exercises:
+            # bulk_update does not apply auto_now
+            now = timezone.now()
+            for exercise in changed_exercises:
+                exercise.updated_at = now
+            Exercise.objects.bulk_update(
+                changed_exercises, sorted(exercise_fields | {'updated_at'}),
+                batch_size=chunk_size
+            )
+
+        for program in new_programs:
+            program.created_by = user
+        WorkoutProgram.objects.bulk_create(new_programs, batch_size=chunk_size)
+        if changed_programs:
+            WorkoutProgram.objects.bulk_update(
+                changed_programs, sorted(program_fields), batch_size=chunk_size
+            )
+
+        days_by_name = {item['name']: item.get('days', []) for item in program_items}
+        # Enrollments pinned to older versions refer to stored day ids, so
+        # changed schedules are diffed in place rather than recreated
+        for program in reschedule:
+            apply_program_days(
+                program, _tree_days(days_by_name[program.name], exercises_by_name),
+                batch_size=chunk_size
+            )
+        day_rows, day_exercise_rows = [], []
+        for program in new_programs:
+            days, day_exercises = _build_days(program, days_by_name[program.name], exercises_by_name)
+            day_rows.extend(days)
+            day_exercise_rows.extend(day_exercises)
+        ProgramDay.objects.bulk_create(day_rows, batch_size=chunk_size)
+        DayExercise.objects.bulk_create(day_exercise_rows, batch_size=chunk_size)
+
+        # Bulk writes send no signals: refresh what they would have
+        touched.update(changed_program_ids)
+        touched.update(program.pk for program in new_programs)
+        if changed_exercises:
+            touched.update(WorkoutProgram.objects.filter(
+                days__exercises__exercise__in=changed_exercises
+            ).values_list('pk', flat=True))
+
+        CatalogPackImport.objects.update_or_create(
+            version=version,
+            defaults={'checksum': checksum, 'report': report, 'applied_by': user}
+        )
+        transaction.on_commit(bump_catalog_version)
+        transaction.on_commit(exercise_index.invalidate)
+
+    return report
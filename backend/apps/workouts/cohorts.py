@@ -0,0 +1,84 @@
+"""
+Bulk enrollment of a cohort of customers into one program.
+
+Users who already have an active enrollment in the program are skipped.
+The rest are inserted with a single bulk_create that ignores conflicts
+with the active-enrollment constraint, so a concurrent enroll can never
+produce a duplicate. Enrollments are created with client-side ids, and
+one query afterwards tells which rows were really inserted.
+"""
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from apps.progress.cache import bump_user_versions
+from .models import UserEnrollment
+from .versions import current_version
+
+
+class CohortTooLargeError(Exception):
+    pass
+
+
+def enroll_cohort(program, user_ids=None, filters=None, start_date=None, max_users=None):
+    """
+    Enroll customers into `program` and return the outcome per user.
+
+    Raises CohortTooLargeError if more than `max_users` customers match.
+    """
+    User = get_user_model()
+    users = User.objects.filter(role=User.Role.CUSTOMER)
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    if filters:
+        users = users.filter(**filters)
+    users = users.order_by('pk').values_list('pk', flat=True)
+    if max_users is not None:
+        # One extra row tells that the limit was exceeded
+        users = users[:max_users + 1]
+    found = list(users)
+    if max_users is not None and len(found) > max_users:
+        raise CohortTooLargeError(max_users)
+
+    already = set(UserEnrollment.objects.filter(
+        program=program,
+        status=UserEnrollment.Status.ACTIVE,
+        user_id__in=found
+    ).values_list('user_id', flat=True))
+
+    version = current_version(program)
+    start_date = start_date or timezone.now().date()
+    rows = [
+        UserEnrollment(
+            user_id=user_id,
+            program=program,
+            program_version=version,
+            start_date=start_date
+        )
+        for user_id in found if user_id not in already
+    ]
+    UserEnrollment.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+    inserted = set(UserEnrollment.objects.filter(
+        pk__in=[row.pk for row in rows]
+    ).values_list('user_id', flat=True))
+    # bulk_create sends no signals: drop the enrolled users' cached stats
+    transaction.on_commit(partial(bump_user_versions, inserted))
+
+    results = [
+        {'user_id': user_id, 'status': 'enrolled' if user_id in inserted else 'already_enrolled'}
+        for user_id in found
+    ]
+    found = set(found)
+    results += [
+        {'user_id': user_id, 'status': 'not_found'}
+        for user_id in dict.fromkeys(user_ids or []) if user_id not in found
+    ]
+
+    return {
+        'program_id': program.pk,
+        'enrolled': len(inserted),
+        'skipped': len(results) - len(inserted),
+        'results': results,
+    }
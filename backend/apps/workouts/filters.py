@@ -0,0 +1,38 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+from rest_framework.filters import SearchFilter
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    `?search=` backed by the trigger-maintained `search_vector` column.
+
+    On PostgreSQL every search term is matched as a prefix against the
+    weighted tsvector (GIN indexed) and results are ordered by rank unless
+    an explicit `?ordering=` is given. Other databases fall back to the
+    regular ILIKE search over `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if connection.vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        terms = [
+            word
+            for term in self.get_search_terms(request)
+            for word in re.findall(r'\w+', term)
+        ]
+        if not terms:
+            return queryset
+
+        query = SearchQuery(
+            ' & '.join(f'{word}:*' for word in terms),
+            config='english',
+            search_type='raw'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', 'pk')
@@ -0,0 +1,86 @@
+"""
+Batch enrollment state transitions.
+
+Enrollment status otherwise only changes when a workout is completed, so
+users who drop off stay active forever. run_enrollment_maintenance()
+applies three transitions, in this order:
+
+- complete: active enrollments already past the last week of the program
+  version they are pinned to (or of the live program), compared against
+  the version's duration_weeks column rather than its document
+- pause: active enrollments without a workout for `stale_days`, counted
+  from the start date for enrollments with no workouts yet
+- expire: paused enrollments idle for `expire_days` are cancelled
+
+Candidates are selected in primary-key chunks and each chunk is moved with
+one UPDATE, so the job never holds more than a chunk of ids in memory.
+"""
+from datetime import timedelta
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.progress.cache import bump_user_versions
+from apps.progress.models import WorkoutHistory
+from .models import UserEnrollment
+
+
+def _recent_workouts(since):
+    return Exists(WorkoutHistory.objects.filter(
+        user_id=OuterRef('user_id'),
+        program_id=OuterRef('program_id'),
+        completed_at__gte=since
+    ))
+
+
+def _transition(candidates, from_status, to_status, now, chunk_size, dry_run):
+    """Move `candidates` from one status to another, chunk by chunk."""
+    rows = candidates.filter(status=from_status).order_by('pk').values_list('pk', 'user_id')
+    moved = 0
+    last = None
+    while True:
+        chunk = list((rows if last is None else rows.filter(pk__gt=last))[:chunk_size])
+        if not chunk:
+            return moved
+        last = chunk[-1][0]
+        if dry_run:
+            moved += len(chunk)
+        else:
+            # update() skips auto_now. The UPDATE repeats the candidate
+            # conditions, so rows that changed since they were selected (a
+            # new status, a workout logged meanwhile) are left alone
+            moved += candidates.filter(
+                pk__in=[pk for pk, user_id in chunk],
+                status=from_status
+            ).update(status=to_status, updated_at=now)
+            # update() sends no signals: drop the users' cached stats
+            transaction.on_commit(partial(
+                bump_user_versions, {user_id for pk, user_id in chunk}
+            ))
+
+
+def run_enrollment_maintenance(stale_days, expire_days, chunk_size=5000, dry_run=False):
+    """Apply the transitions and return how many enrollments each one moved."""
+    now = timezone.now()
+    stale_since = now - timedelta(days=stale_days)
+    expire_since = now - timedelta(days=expire_days)
+    Status = UserEnrollment.Status
+
+    finished = UserEnrollment.objects.annotate(
+        weeks=Coalesce(F('program_version__duration_weeks'), F('program__duration_weeks'))
+    ).filter(current_week__gt=F('weeks'))
+    stale = UserEnrollment.objects.filter(
+        start_date__lt=stale_since.date()
+    ).exclude(_recent_workouts(stale_since))
+    idle = UserEnrollment.objects.filter(
+        updated_at__lt=expire_since
+    ).exclude(_recent_workouts(expire_since))
+
+    return {
+        'completed': _transition(finished, Status.ACTIVE, Status.COMPLETED, now, chunk_size, dry_run),
+        'paused': _transition(stale, Status.ACTIVE, Status.PAUSED, now, chunk_size, dry_run),
+        'cancelled': _transition(idle, Status.PAUSED, Status.CANCELLED, now, chunk_size, dry_run),
+    }
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.workouts.catalog import CatalogPackError, apply_pack, parse_pack
+
+
+class Command(BaseCommand):
+    help = 'Applies a versioned JSON or NDJSON catalog pack of exercises and programs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the pack file')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would change without writing anything'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Rows per bulk insert/update statement'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8') as pack_file:
+                pack = parse_pack(pack_file.read())
+            report = apply_pack(
+                pack,
+                dry_run=options['dry_run'],
+                chunk_size=options['chunk_size']
+            )
+        except OSError as exc:
+            raise CommandError(f'Could not read pack: {exc}')
+        except CatalogPackError as exc:
+            raise CommandError(json.dumps(exc.errors, indent=2, default=str))
+
+        prefix = 'Dry run: ' if report['dry_run'] else ''
+        for kind in ('exercises', 'programs'):
+            counts = report[kind]
+            self.stdout.write(
+                f"{prefix}{kind}: {counts['inserted']} inserted, "
+                f"{counts['updated']} updated, {counts['unchanged']} unchanged"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Catalog pack {report['version']} processed"))
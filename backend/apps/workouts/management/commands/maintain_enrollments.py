@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.workouts.maintenance import run_enrollment_maintenance
+
+
+class Command(BaseCommand):
+    help = 'Completes finished, pauses stale and cancels long-paused enrollments (run daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-days',
+            type=int,
+            default=settings.ENROLLMENT_STALE_DAYS,
+            help='Days without a workout before an active enrollment is paused'
+        )
+        parser.add_argument(
+            '--expire-days',
+            type=int,
+            default=settings.ENROLLMENT_EXPIRE_DAYS,
+            help='Days a paused enrollment may stay idle before it is cancelled'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Enrollments per UPDATE statement'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would change without writing anything'
+        )
+
+    def handle(self, *args, **options):
+        report = run_enrollment_maintenance(
+            stale_days=options['stale_days'],
+            expire_days=options['expire_days'],
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run']
+        )
+
+        prefix = 'Dry run: ' if options['dry_run'] else ''
+        self.stdout.write(
+            f"{prefix}{report['completed']} completed, {report['paused']} paused, "
+            f"{report['cancelled']} cancelled"
+        )
+        self.stdout.write(self.style.SUCCESS('Enrollment maintenance finished'))
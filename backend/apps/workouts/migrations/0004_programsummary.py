@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:35
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0003_workoutprogram_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgramSummary',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('total_days', models.PositiveIntegerField(default=0)),
+                ('training_days', models.PositiveIntegerField(default=0)),
+                ('rest_days', models.PositiveIntegerField(default=0)),
+                ('total_exercises', models.PositiveIntegerField(default=0)),
+                ('estimated_session_minutes', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('program', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='workouts.workoutprogram')),
+            ],
+            options={
+                'verbose_name_plural': 'Program summaries',
+                'db_table': 'program_summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:37
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Weighted tsvector columns kept current by triggers: name (A) ranks above
+# description (B) and instructions (C)
+SEARCH_TRIGGERS = {
+    'exercises': [('name', 'A'), ('description', 'B'), ('instructions', 'C')],
+    'workout_programs': [('name', 'A'), ('description', 'B')],
+}
+
+
+def create_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for table, columns in SEARCH_TRIGGERS.items():
+        vector = ' || '.join(
+            f"setweight(to_tsvector('english', coalesce(NEW.{column}, '')), '{weight}')"
+            for column, weight in columns
+        )
+        schema_editor.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {vector};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+        """)
+        schema_editor.execute(f"""
+            CREATE TRIGGER {table}_search_vector_trigger
+            BEFORE INSERT OR UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update();
+        """)
+        schema_editor.execute(
+            f'CREATE INDEX {table}_search_gin ON {table} USING gin (search_vector);'
+        )
+        # Fire the trigger once for existing rows
+        schema_editor.execute(f'UPDATE {table} SET id = id;')
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for table in SEARCH_TRIGGERS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_gin;')
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table};')
+        schema_editor.execute(f'DROP FUNCTION IF EXISTS {table}_search_vector_update();')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0004_programsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='workoutprogram',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # GIN indexes and triggers only exist on PostgreSQL; other backends
+        # keep an unused nullable column and fall back to ILIKE search
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='exercise',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='exercises_search_gin'),
+                ),
+                migrations.AddIndex(
+                    model_name='workoutprogram',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='workout_programs_search_gin'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_triggers, drop_search_triggers),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:43
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0005_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogPackImport',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('version', models.CharField(max_length=50, unique=True)),
+                ('checksum', models.CharField(max_length=64)),
+                ('report', models.JSONField(default=dict)),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+                ('applied_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='catalog_pack_imports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'catalog_pack_imports',
+                'ordering': ['-applied_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:55
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def cancel_duplicate_active_enrollments(apps, schema_editor):
+    # Keep the newest active enrollment of each user/program pair
+    UserEnrollment = apps.get_model('workouts', 'UserEnrollment')
+    active = UserEnrollment.objects.filter(status='active')
+    duplicates = active.values('user_id', 'program_id').annotate(
+        total=Count('id')
+    ).filter(total__gt=1).order_by()
+    for pair in duplicates:
+        enrollments = active.filter(user_id=pair['user_id'], program_id=pair['program_id'])
+        newest = enrollments.order_by('-created_at').values_list('id', flat=True).first()
+        enrollments.exclude(id=newest).update(status='cancelled')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0006_catalogpackimport'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_active_enrollments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userenrollment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'active')), fields=('user', 'program'), name='enrollment_one_active_per_program'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:56
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0007_active_enrollment_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgramVersion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('number', models.PositiveIntegerField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('document', models.JSONField()),
+                ('program_updated_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='workouts.workoutprogram')),
+            ],
+            options={
+                'db_table': 'program_versions',
+                'ordering': ['-number'],
+            },
+        ),
+        migrations.AddField(
+            model_name='userenrollment',
+            name='program_version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='enrollments', to='workouts.programversion'),
+        ),
+        migrations.AddConstraint(
+            model_name='programversion',
+            constraint=models.UniqueConstraint(fields=('program', 'number'), name='program_version_number'),
+        ),
+        migrations.AddConstraint(
+            model_name='programversion',
+            constraint=models.UniqueConstraint(fields=('program', 'content_hash'), name='program_version_content'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def backfill_program_summaries(apps, schema_editor):
+    # Uses the real model: historical models do not carry refresh(), and
+    # without a backfill the first read of each program writes its summary
+    from apps.workouts.models import ProgramSummary
+
+    WorkoutProgram = apps.get_model('workouts', 'WorkoutProgram')
+    for program_id in WorkoutProgram.objects.values_list('id', flat=True).iterator():
+        ProgramSummary.refresh(program_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0008_programversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_program_summaries, migrations.RunPython.noop),
+    ]
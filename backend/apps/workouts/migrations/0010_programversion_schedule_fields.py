@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+
+def copy_schedule_fields(apps, schema_editor):
+    ProgramVersion = apps.get_model('workouts', 'ProgramVersion')
+    versions = ProgramVersion.objects.only('id', 'document').iterator(chunk_size=500)
+    batch = []
+    for version in versions:
+        version.duration_weeks = version.document['duration_weeks']
+        version.days_per_week = version.document['days_per_week']
+        batch.append(version)
+        if len(batch) == 500:
+            ProgramVersion.objects.bulk_update(batch, ['duration_weeks', 'days_per_week'])
+            batch = []
+    ProgramVersion.objects.bulk_update(batch, ['duration_weeks', 'days_per_week'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0009_backfill_program_summaries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='programversion',
+            name='duration_weeks',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='programversion',
+            name='days_per_week',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.RunPython(copy_schedule_fields, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='programversion',
+            name='duration_weeks',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='programversion',
+            name='days_per_week',
+            field=models.PositiveIntegerField(),
+        ),
+    ]
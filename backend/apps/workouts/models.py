@@ -1,6 +1,15 @@
 import uuid
-from django.db import models
+from functools import partial
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Count, Prefetch, Q, Sum
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.utils import timezone
+
+from .cache import bump_program_version
 
 
 class Exercise(models.Model):
@@ -66,17 +75,47 @@ class Exercise(models.Model):
     rest_time = models.PositiveIntegerField(default=60, help_text='Rest time in seconds')
     safety_tips = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
+    # Maintained by a database trigger on PostgreSQL (see migration 0005)
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'exercises'
         ordering = ['name']
+        indexes = [GinIndex(fields=['search_vector'], name='exercises_search_gin')]
 
     def __str__(self):
         return self.name
 
 
+class WorkoutProgramQuerySet(models.QuerySet):
+    def with_enrollment_count(self):
+        """Annotate each program with its number of active enrollments."""
+        return self.annotate(
+            active_enrollment_count=Count(
+                'enrollments',
+                filter=Q(enrollments__status='active')
+            )
+        )
+
+    def touch(self):
+        """
+        Record a change to the nested structure of these programs.
+
+        Refreshes their summaries, bumps updated_at (used for HTTP
+        validators) and, once the transaction commits, the cached document
+        version. Uses update(), so no model signals are sent; bulk writes
+        to days and day exercises must call this themselves.
+        """
+        program_ids = list(self.order_by().values_list('pk', flat=True).distinct())
+        WorkoutProgram.objects.filter(pk__in=program_ids).update(updated_at=timezone.now())
+        for program_id in program_ids:
+            ProgramSummary.refresh(program_id)
+            transaction.on_commit(partial(bump_program_version, program_id))
+        return program_ids
+
+
 class WorkoutProgram(models.Model):
     class Goal(models.TextChoices):
         WEIGHT_LOSS = 'weight_loss', 'Weight Loss'
@@ -120,12 +159,17 @@ class WorkoutProgram(models.Model):
         related_name='created_programs'
     )
     is_active = models.BooleanField(default=True)
+    # Maintained by a database trigger on PostgreSQL (see migration 0005)
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = WorkoutProgramQuerySet.as_manager()
+
     class Meta:
         db_table = 'workout_programs'
         ordering = ['-created_at']
+        indexes = [GinIndex(fields=['search_vector'], name='workout_programs_search_gin')]
 
     def __str__(self):
         return self.name
@@ -191,6 +235,120 @@ class DayExercise(models.Model):
         return self.custom_rest_time or self.exercise.rest_time
 
 
+class ProgramSummary(models.Model):
+    """Precomputed aggregates for a program, kept current by signals."""
+
+    # Rough time to perform one set, used to estimate session length
+    SECONDS_PER_SET = 45
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    program = models.OneToOneField(
+        WorkoutProgram,
+        on_delete=models.CASCADE,
+        related_name='summary'
+    )
+    total_days = models.PositiveIntegerField(default=0)
+    training_days = models.PositiveIntegerField(default=0)
+    rest_days = models.PositiveIntegerField(default=0)
+    total_exercises = models.PositiveIntegerField(default=0)
+    estimated_session_minutes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'program_summaries'
+        verbose_name_plural = 'Program summaries'
+
+    def __str__(self):
+        return f"{self.program_id} summary"
+
+    @classmethod
+    def refresh(cls, program_id):
+        """Recompute and store the summary for a program."""
+        day_stats = ProgramDay.objects.filter(program_id=program_id).aggregate(
+            total=Count('id'),
+            rest=Count('id', filter=Q(is_rest_day=True)),
+        )
+        exercise_stats = DayExercise.objects.filter(day__program_id=program_id).aggregate(
+            total=Count('id'),
+            seconds=Sum(
+                Coalesce('custom_sets', 'exercise__sets') * (
+                    cls.SECONDS_PER_SET
+                    + Coalesce('custom_rest_time', 'exercise__rest_time')
+                )
+            ),
+        )
+        training_days = day_stats['total'] - day_stats['rest']
+        estimated_minutes = 0
+        if training_days:
+            estimated_minutes = round((exercise_stats['seconds'] or 0) / training_days / 60)
+
+        summary, created = cls.objects.update_or_create(
+            program_id=program_id,
+            defaults={
+                'total_days': day_stats['total'],
+                'training_days': training_days,
+                'rest_days': day_stats['rest'],
+                'total_exercises': exercise_stats['total'],
+                'estimated_session_minutes': estimated_minutes,
+            }
+        )
+        return summary
+
+    @classmethod
+    def for_program(cls, program):
+        """Return the stored summary, building it on first access."""
+        try:
+            return program.summary
+        except cls.DoesNotExist:
+            return cls.refresh(program.pk)
+
+
+class ProgramVersion(models.Model):
+    """
+    Immutable snapshot of a program document. Enrollments pin the version
+    they started on; see versions.py for how versions are captured.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    program = models.ForeignKey(
+        WorkoutProgram,
+        on_delete=models.CASCADE,
+        related_name='versions'
+    )
+    number = models.PositiveIntegerField()
+    content_hash = models.CharField(max_length=64)
+    document = models.JSONField()
+    # Copied out of the document so batch jobs never parse it
+    duration_weeks = models.PositiveIntegerField()
+    days_per_week = models.PositiveIntegerField()
+    # program.updated_at as of the last time this content was current
+    program_updated_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'program_versions'
+        ordering = ['-number']
+        constraints = [
+            models.UniqueConstraint(fields=['program', 'number'], name='program_version_number'),
+            models.UniqueConstraint(fields=['program', 'content_hash'], name='program_version_content'),
+        ]
+
+    def __str__(self):
+        return f"{self.program_id} v{self.number}"
+
+
+class UserEnrollmentQuerySet(models.QuerySet):
+    def with_program(self):
+        """
+        Load each enrollment's program with its active enrollment count,
+        and its pinned version without the document.
+        """
+        return self.select_related('program_version').defer(
+            'program_version__document'
+        ).prefetch_related(
+            Prefetch('program', queryset=WorkoutProgram.objects.with_enrollment_count())
+        )
+
+
 class UserEnrollment(models.Model):
     class Status(models.TextChoices):
         ACTIVE = 'active', 'Active'
@@ -217,12 +375,53 @@ class UserEnrollment(models.Model):
     )
     current_week = models.PositiveIntegerField(default=1)
     current_day = models.PositiveIntegerField(default=1)
+    program_version = models.ForeignKey(
+        ProgramVersion,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='enrollments'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = UserEnrollmentQuerySet.as_manager()
+
     class Meta:
         db_table = 'user_enrollments'
         ordering = ['-created_at']
+        constraints = [
+            # At most one active enrollment per user and program; enrolling
+            # relies on this instead of checking first
+            models.UniqueConstraint(
+                fields=['user', 'program'],
+                condition=Q(status='active'),
+                name='enrollment_one_active_per_program'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.name} - {self.program.name}"
+
+
+class CatalogPackImport(models.Model):
+    """A catalog pack version that was applied to the exercise library."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    version = models.CharField(max_length=50, unique=True)
+    checksum = models.CharField(max_length=64)
+    report = models.JSONField(default=dict)
+    applied_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='catalog_pack_imports'
+    )
+    applied_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'catalog_pack_imports'
+        ordering = ['-applied_at']
+
+    def __str__(self):
+        return f"Catalog pack {self.version}"
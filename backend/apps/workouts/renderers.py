@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+def _escape(text):
+    return (
+        str(text).replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    # Content lines are limited to 75 octets, continued with a leading space
+    encoded = line.encode()
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    parts.append(encoded.decode())
+    return '\r\n '.join(parts)
+
+
+class ICalendarRenderer(BaseRenderer):
+    """Renders an enrollment calendar (see schedule.py) as iCalendar events."""
+    media_type = 'text/calendar'
+    format = 'ics'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None and not 200 <= response.status_code < 300:
+            # Errors are not calendars: send them as JSON
+            renderer = JSONRenderer()
+            response['Content-Type'] = f'{renderer.media_type}; charset={self.charset}'
+            return renderer.render(data, renderer_context=renderer_context)
+
+        stamp = timezone.now().strftime('%Y%m%dT%H%M%SZ')
+        lines = [
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            'PRODID:-//Workout Fitness Manager//Enrollment calendar//EN',
+            'CALSCALE:GREGORIAN',
+        ]
+        if isinstance(data, dict):
+            lines.append(f"X-WR-CALNAME:{_escape(data.get('program_name', ''))}")
+            for day in data.get('days', []):
+                if day['date'] is None or day['is_rest_day']:
+                    continue
+                lines += [
+                    'BEGIN:VEVENT',
+                    f"UID:{data['enrollment_id']}-{day['day_id']}@workout-fitness-manager",
+                    f'DTSTAMP:{stamp}',
+                    f"DTSTART;VALUE=DATE:{day['date']:%Y%m%d}",
+                    f"DTEND;VALUE=DATE:{day['date'] + timedelta(days=1):%Y%m%d}",
+                    f"SUMMARY:{_escape(data['program_name'])}: {_escape(day['day_name'])}",
+                    f"DESCRIPTION:Week {day['week_number']}\\, day {day['day_number']} ({day['status']})",
+                    'END:VEVENT',
+                ]
+        lines.append('END:VCALENDAR')
+        return ('\r\n'.join(_fold(line) for line in lines) + '\r\n').encode(self.charset)
@@ -0,0 +1,82 @@
+"""
+Projected calendar for an enrollment.
+
+The schedule is the one of the program version the enrollment is pinned
+to, as on the today and current-program endpoints. Program days are laid
+out on the calendar from the enrollment's start date, with a program week
+spread over seven days. Days before the current position are taken from
+the user's workout history, matched by (week_number, day_number) since the
+live days may have changed. If the user is behind, the remaining days move
+forward so the current day falls on the next free date: today, or tomorrow
+if a workout was already logged today.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.progress.models import WorkoutHistory
+from .versions import version_document
+
+
+def _day_offset(week_number, day_number, days_per_week):
+    return (week_number - 1) * 7 + (day_number - 1) * 7 // max(days_per_week, 1)
+
+
+def build_calendar(enrollment, version):
+    """Return the enrollment's schedule with one entry per day of `version`."""
+    program = version_document(version)
+    today = timezone.localdate()
+    days = sorted(program['days'], key=lambda day: (day['week_number'], day['day_number']))
+
+    completed = {}
+    last_completed = None
+    history = WorkoutHistory.objects.filter(
+        user_id=enrollment.user_id,
+        program_id=enrollment.program_id,
+        completed_at__date__gte=enrollment.start_date
+    ).order_by('completed_at').values_list(
+        'day__week_number', 'day__day_number', 'completed_at'
+    )
+    for week_number, day_number, completed_at in history:
+        completed_on = timezone.localdate(completed_at)
+        if week_number is not None:
+            completed.setdefault((week_number, day_number), completed_on)
+        last_completed = completed_on
+
+    current = (enrollment.current_week, enrollment.current_day)
+    finished = enrollment.status == enrollment.Status.COMPLETED
+    next_free = today + timedelta(days=1) if last_completed == today else today
+    planned = enrollment.start_date + timedelta(
+        days=_day_offset(*current, program['days_per_week'])
+    )
+    shift = max(next_free - planned, timedelta(0))
+
+    entries = []
+    for day in days:
+        slot = (day['week_number'], day['day_number'])
+        entry = {
+            'day_id': day['id'],
+            'week_number': day['week_number'],
+            'day_number': day['day_number'],
+            'day_name': day['day_name'],
+            'is_rest_day': day['is_rest_day'],
+        }
+        if finished or slot < current:
+            entry['date'] = completed.get(slot)
+            entry['status'] = 'completed' if slot in completed else 'skipped'
+        else:
+            entry['date'] = enrollment.start_date + shift + timedelta(
+                days=_day_offset(*slot, program['days_per_week'])
+            )
+            entry['status'] = 'scheduled'
+        entries.append(entry)
+
+    return {
+        'enrollment_id': enrollment.pk,
+        'program_id': enrollment.program_id,
+        'program_version': version.number,
+        'program_name': program['name'],
+        'start_date': enrollment.start_date,
+        'status': enrollment.status,
+        'days': entries,
+    }
@@ -1,15 +1,23 @@
+from django.db import transaction
+from django.db.models import Q
 from rest_framework import serializers
-from .models import Exercise, WorkoutProgram, ProgramDay, DayExercise, UserEnrollment
+from apps.users.models import User
+from config.fieldsets import SparseFieldsetMixin
+from .models import (
+    Exercise, WorkoutProgram, ProgramDay, DayExercise, UserEnrollment, ProgramSummary
+)
+from .signals import defer_program_touches
+from .tree import apply_program_days
 
 
-class ExerciseSerializer(serializers.ModelSerializer):
+class ExerciseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Exercise
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ExerciseListSerializer(serializers.ModelSerializer):
+class ExerciseListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Exercise
         fields = [
@@ -18,7 +26,7 @@ class ExerciseListSerializer(serializers.ModelSerializer):
         ]
 
 
-class DayExerciseSerializer(serializers.ModelSerializer):
+class DayExerciseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     exercise = ExerciseSerializer(read_only=True)
     exercise_id = serializers.UUIDField(write_only=True)
     sets = serializers.ReadOnlyField()
@@ -33,8 +41,25 @@ class DayExerciseSerializer(serializers.ModelSerializer):
             'notes', 'sets', 'reps', 'rest_time'
         ]
 
-
-class ProgramDaySerializer(serializers.ModelSerializer):
+    def get_fields(self):
+        fields = super().get_fields()
+        if 'exercise_map' in self.context and fields.pop('exercise', None) is not None:
+            # Normalized mode: only the id here, the exercise itself goes
+            # into the shared exercise_map once
+            fields['exercise_id'] = serializers.UUIDField(read_only=True)
+        return fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        exercise_map = self.context.get('exercise_map')
+        if exercise_map is not None and 'exercise_id' in data:
+            key = str(instance.exercise_id)
+            if key not in exercise_map:
+                exercise_map[key] = ExerciseSerializer(instance.exercise).data
+        return data
+
+
+class ProgramDaySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     exercises = DayExerciseSerializer(many=True, read_only=True)
 
     class Meta:
@@ -45,9 +70,24 @@ class ProgramDaySerializer(serializers.ModelSerializer):
         ]
 
 
+class DayExerciseCreateSerializer(serializers.ModelSerializer):
+    # Optional on updates to match an existing row
+    id = serializers.UUIDField(required=False)
+    exercise_id = serializers.UUIDField()
+
+    class Meta:
+        model = DayExercise
+        fields = [
+            'id', 'exercise_id', 'order_index', 'custom_sets',
+            'custom_reps', 'custom_rest_time', 'notes'
+        ]
+
+
 class ProgramDayCreateSerializer(serializers.ModelSerializer):
-    exercises = serializers.ListField(
-        child=serializers.DictField(),
+    # Optional on updates to match an existing row
+    id = serializers.UUIDField(required=False)
+    exercises = DayExerciseCreateSerializer(
+        many=True,
         write_only=True,
         required=False
     )
@@ -55,16 +95,31 @@ class ProgramDayCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProgramDay
         fields = [
-            'week_number', 'day_number', 'day_name',
+            'id', 'week_number', 'day_number', 'day_name',
             'description', 'is_rest_day', 'exercises'
         ]
 
 
-class WorkoutProgramSerializer(serializers.ModelSerializer):
+class ProgramSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProgramSummary
+        fields = [
+            'total_days', 'training_days', 'rest_days',
+            'total_exercises', 'estimated_session_minutes'
+        ]
+
+
+class WorkoutProgramSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     days = ProgramDaySerializer(many=True, read_only=True)
     created_by_name = serializers.CharField(source='created_by.name', read_only=True)
     total_exercises = serializers.SerializerMethodField()
+    summary = serializers.SerializerMethodField()
     enrollment_count = serializers.SerializerMethodField()
+    sparse_sources = {
+        'total_exercises': ['summary'],
+        'summary': ['summary'],
+        'enrollment_count': [],
+    }
 
     class Meta:
         model = WorkoutProgram
@@ -72,22 +127,58 @@ class WorkoutProgramSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'goal', 'gender_focus',
             'difficulty', 'image', 'media_url', 'duration_weeks', 'days_per_week',
             'created_by', 'created_by_name', 'is_active',
-            'created_at', 'days', 'total_exercises', 'enrollment_count'
+            'created_at', 'days', 'total_exercises', 'summary', 'enrollment_count'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by']
 
     def get_total_exercises(self, obj):
-        count = 0
-        for day in obj.days.all():
-            count += day.exercises.count()
-        return count
+        return ProgramSummary.for_program(obj).total_exercises
+
+    def get_summary(self, obj):
+        return ProgramSummarySerializer(ProgramSummary.for_program(obj)).data
 
     def get_enrollment_count(self, obj):
+        if hasattr(obj, 'active_enrollment_count'):
+            return obj.active_enrollment_count
         return obj.enrollments.filter(status='active').count()
 
 
-class WorkoutProgramListSerializer(serializers.ModelSerializer):
+class ProgramOutlineDaySerializer(serializers.ModelSerializer):
+    exercise_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProgramDay
+        fields = ['id', 'day_number', 'day_name', 'is_rest_day', 'exercise_count']
+
+    def get_exercise_count(self, obj):
+        if hasattr(obj, 'exercise_count'):
+            return obj.exercise_count
+        return obj.exercises.count()
+
+
+class WorkoutProgramOutlineSerializer(WorkoutProgramSerializer):
+    """Program detail with the schedule as a week outline, without exercises."""
+    days = None
+    weeks = serializers.SerializerMethodField()
+    sparse_sources = {**WorkoutProgramSerializer.sparse_sources, 'weeks': ['days']}
+
+    class Meta(WorkoutProgramSerializer.Meta):
+        fields = [
+            field for field in WorkoutProgramSerializer.Meta.fields if field != 'days'
+        ] + ['weeks']
+
+    def get_weeks(self, obj):
+        weeks = []
+        for day in obj.days.all():
+            if not weeks or weeks[-1]['week_number'] != day.week_number:
+                weeks.append({'week_number': day.week_number, 'days': []})
+            weeks[-1]['days'].append(ProgramOutlineDaySerializer(day).data)
+        return weeks
+
+
+class WorkoutProgramListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     enrollment_count = serializers.SerializerMethodField()
+    sparse_sources = {'enrollment_count': []}
 
     class Meta:
         model = WorkoutProgram
@@ -98,6 +189,8 @@ class WorkoutProgramListSerializer(serializers.ModelSerializer):
         ]
 
     def get_enrollment_count(self, obj):
+        if hasattr(obj, 'active_enrollment_count'):
+            return obj.active_enrollment_count
         return obj.enrollments.filter(status='active').count()
 
 
@@ -111,40 +204,348 @@ class WorkoutProgramCreateSerializer(serializers.ModelSerializer):
             'difficulty', 'image', 'media_url', 'duration_weeks', 'days_per_week', 'days'
         ]
 
+    def validate_days(self, days):
+        """
+        Check week/day uniqueness, every exercise_id in one query and, on
+        updates, that any day or day exercise ids belong to this program.
+        """
+        exercise_ids = {
+            exercise['exercise_id']
+            for day in days
+            for exercise in day.get('exercises', [])
+        }
+        existing = set(
+            Exercise.objects.filter(pk__in=exercise_ids).values_list('pk', flat=True)
+        )
+        day_ids, day_exercise_ids = set(), set()
+        if self.instance is not None:
+            day_ids = set(self.instance.days.values_list('pk', flat=True))
+            day_exercise_ids = set(DayExercise.objects.filter(
+                day__program=self.instance
+            ).values_list('pk', flat=True))
+
+        errors = []
+        seen = set()
+        for day in days:
+            day_errors = {}
+            for field in ('week_number', 'day_number'):
+                if field not in day:
+                    day_errors[field] = ['This field is required.']
+            slot = (day.get('week_number'), day.get('day_number'))
+            if not day_errors and slot in seen:
+                day_errors['day_number'] = ['Duplicate week_number/day_number in this program.']
+            seen.add(slot)
+            if 'id' in day and day['id'] not in day_ids:
+                day_errors['id'] = ['Day not found in this program.']
+
+            exercise_errors = []
+            for exercise in day.get('exercises', []):
+                exercise_error = {}
+                if exercise['exercise_id'] not in existing:
+                    exercise_error['exercise_id'] = ['Exercise not found.']
+                if 'id' in exercise and exercise['id'] not in day_exercise_ids:
+                    exercise_error['id'] = ['Day exercise not found in this program.']
+                exercise_errors.append(exercise_error)
+            if any(exercise_errors):
+                day_errors['exercises'] = exercise_errors
+            errors.append(day_errors)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return days
+
     def create(self, validated_data):
         days_data = validated_data.pop('days', [])
-        program = WorkoutProgram.objects.create(**validated_data)
-
-        for day_data in days_data:
-            exercises_data = day_data.pop('exercises', [])
-            day = ProgramDay.objects.create(program=program, **day_data)
-
-            for idx, exercise_data in enumerate(exercises_data):
-                DayExercise.objects.create(
-                    day=day,
-                    exercise_id=exercise_data.get('exercise_id'),
-                    order_index=exercise_data.get('order_index', idx),
-                    custom_sets=exercise_data.get('custom_sets'),
-                    custom_reps=exercise_data.get('custom_reps'),
-                    custom_rest_time=exercise_data.get('custom_rest_time'),
-                    notes=exercise_data.get('notes', '')
+
+        with transaction.atomic():
+            program = WorkoutProgram.objects.create(**validated_data)
+
+            days = []
+            day_exercises = []
+            for day_data in days_data:
+                exercises_data = day_data.pop('exercises', [])
+                day_data.pop('id', None)
+                day = ProgramDay(program=program, **day_data)
+                days.append(day)
+
+                for idx, exercise_data in enumerate(exercises_data):
+                    exercise_data.pop('id', None)
+                    exercise_data.setdefault('order_index', idx)
+                    day_exercises.append(DayExercise(day=day, **exercise_data))
+
+            ProgramDay.objects.bulk_create(days, batch_size=500)
+            DayExercise.objects.bulk_create(day_exercises, batch_size=500)
+            # bulk_create skips the signals that maintain summaries and caches
+            WorkoutProgram.objects.filter(pk=program.pk).touch()
+
+        return program
+
+    def update(self, instance, validated_data):
+        """
+        Update program fields and, when `days` is given, diff the stored
+        tree against it and apply the result with bulk statements in one
+        transaction.
+        """
+        days_data = validated_data.pop('days', None)
+
+        with transaction.atomic(), defer_program_touches() as touched:
+            # Serialize concurrent edits of the same program
+            WorkoutProgram.objects.select_for_update().filter(pk=instance.pk).first()
+            instance = super().update(instance, validated_data)
+            if days_data is not None:
+                apply_program_days(instance, days_data)
+                touched.add(instance.pk)
+
+        return instance
+
+
+class DayExerciseReorderSerializer(serializers.Serializer):
+    """
+    Sets the order of a day's exercises from an ordered list of ids.
+    Ids from other days of the same program are moved into this day and
+    the days they leave are renumbered.
+    """
+    exercise_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=True)
+
+    def validate_exercise_ids(self, exercise_ids):
+        if len(set(exercise_ids)) != len(exercise_ids):
+            raise serializers.ValidationError('Duplicate ids in this list.')
+        return exercise_ids
+
+    def create(self, validated_data):
+        day = self.context['day']
+        exercise_ids = validated_data['exercise_ids']
+
+        with transaction.atomic():
+            # Same program lock as full tree edits, then the rows themselves
+            WorkoutProgram.objects.select_for_update().filter(pk=day.program_id).first()
+            rows = list(
+                DayExercise.objects.select_for_update().filter(
+                    Q(day=day) | Q(pk__in=exercise_ids, day__program_id=day.program_id)
+                ).order_by('pk')
+            )
+            by_id = {row.pk: row for row in rows}
+            errors = {}
+            missing = [str(pk) for pk in exercise_ids if pk not in by_id]
+            if missing:
+                errors['exercise_ids'] = [f'Not in this program: {", ".join(missing)}.']
+            left_out = [str(row.pk) for row in rows if row.day_id == day.pk and row.pk not in exercise_ids]
+            if left_out:
+                errors.setdefault('exercise_ids', []).append(
+                    f'Every exercise of the day must be listed, missing: {", ".join(left_out)}.'
                 )
+            if errors:
+                raise serializers.ValidationError(errors)
+
+            # Lock the rest of the days being moved out of so they renumber cleanly
+            source_days = {by_id[pk].day_id for pk in exercise_ids} - {day.pk}
+            remaining = list(
+                DayExercise.objects.select_for_update().filter(
+                    day_id__in=source_days
+                ).exclude(pk__in=exercise_ids).order_by('day_id', 'order_index', 'pk')
+            )
+
+            changed = []
+            for index, pk in enumerate(exercise_ids):
+                row = by_id[pk]
+                if row.day_id != day.pk or row.order_index != index:
+                    row.day_id, row.order_index = day.pk, index
+                    changed.append(row)
+            positions = {}
+            for row in remaining:
+                index = positions.get(row.day_id, 0)
+                positions[row.day_id] = index + 1
+                if row.order_index != index:
+                    row.order_index = index
+                    changed.append(row)
+
+            if changed:
+                DayExercise.objects.bulk_update(changed, ['day_id', 'order_index'])
+                WorkoutProgram.objects.filter(pk=day.program_id).touch()
+
+        return day
+
+
+class ProgramCloneSerializer(serializers.Serializer):
+    """Deep-copies a program tree with optional transforms."""
+    name = serializers.CharField(max_length=255, required=False)
+    duration_weeks = serializers.IntegerField(min_value=1, required=False)
+    difficulty = serializers.ChoiceField(
+        choices=WorkoutProgram.Difficulty.choices, required=False
+    )
+    gender_focus = serializers.ChoiceField(
+        choices=WorkoutProgram.GenderFocus.choices, required=False
+    )
+    drop_rest_days = serializers.BooleanField(default=False)
+
+    def create(self, validated_data):
+        source = self.context['program']
+        days = list(source.days.prefetch_related('exercises'))
+        source_weeks = sorted({day.week_number for day in days})
+        duration_weeks = validated_data.get('duration_weeks', source.duration_weeks)
+
+        if duration_weeks == source.duration_weeks:
+            # Same length: weeks are copied as they are, gaps included
+            week_map = {week: [week] for week in source_weeks}
+        else:
+            # Longer programs repeat the source weeks in order; shorter ones
+            # keep the first weeks
+            week_map = {}
+            for week in range(1, duration_weeks + 1):
+                if source_weeks:
+                    week_map.setdefault(
+                        source_weeks[(week - 1) % len(source_weeks)], []
+                    ).append(week)
+
+        day_rows = []
+        day_exercise_rows = []
+        days_per_week = source.days_per_week
+        with transaction.atomic():
+            program = WorkoutProgram.objects.create(
+                name=validated_data.get('name', f'{source.name} (Copy)'),
+                description=source.description,
+                goal=source.goal,
+                gender_focus=validated_data.get('gender_focus', source.gender_focus),
+                difficulty=validated_data.get('difficulty', source.difficulty),
+                media_url=source.media_url,
+                image=source.image,
+                duration_weeks=duration_weeks,
+                days_per_week=days_per_week,
+                created_by=self.context['request'].user,
+                is_active=source.is_active,
+            )
+
+            for source_week in source_weeks:
+                week_days = [day for day in days if day.week_number == source_week]
+                if validated_data['drop_rest_days']:
+                    week_days = [day for day in week_days if not day.is_rest_day]
+                for target_week in week_map.get(source_week, []):
+                    for day_number, day in enumerate(week_days, 1):
+                        new_day = ProgramDay(
+                            program=program,
+                            week_number=target_week,
+                            day_number=day_number if validated_data['drop_rest_days'] else day.day_number,
+                            day_name=day.day_name,
+                            description=day.description,
+                            is_rest_day=day.is_rest_day,
+                        )
+                        day_rows.append(new_day)
+                        day_exercise_rows.extend(
+                            DayExercise(
+                                day=new_day,
+                                exercise_id=day_exercise.exercise_id,
+                                order_index=day_exercise.order_index,
+                                custom_sets=day_exercise.custom_sets,
+                                custom_reps=day_exercise.custom_reps,
+                                custom_rest_time=day_exercise.custom_rest_time,
+                                notes=day_exercise.notes,
+                            )
+                            for day_exercise in day.exercises.all()
+                        )
+
+            if validated_data['drop_rest_days'] and day_rows:
+                # Days were renumbered, so the week length is what is left
+                program.days_per_week = max(day.day_number for day in day_rows)
+                program.save(update_fields=['days_per_week', 'updated_at'])
+
+            ProgramDay.objects.bulk_create(day_rows, batch_size=500)
+            DayExercise.objects.bulk_create(day_exercise_rows, batch_size=500)
+            WorkoutProgram.objects.filter(pk=program.pk).touch()
 
         return program
 
 
+class CatalogDayExerciseSerializer(serializers.ModelSerializer):
+    exercise = serializers.CharField(help_text='Exercise name')
+
+    class Meta:
+        model = DayExercise
+        fields = [
+            'exercise', 'order_index', 'custom_sets',
+            'custom_reps', 'custom_rest_time', 'notes'
+        ]
+
+
+class CatalogProgramDaySerializer(serializers.ModelSerializer):
+    exercises = CatalogDayExerciseSerializer(many=True, required=False)
+
+    class Meta:
+        model = ProgramDay
+        fields = [
+            'week_number', 'day_number', 'day_name',
+            'description', 'is_rest_day', 'exercises'
+        ]
+
+
+class CatalogProgramSerializer(serializers.ModelSerializer):
+    days = CatalogProgramDaySerializer(many=True, required=False)
+
+    class Meta:
+        model = WorkoutProgram
+        fields = [
+            'name', 'description', 'goal', 'gender_focus', 'difficulty',
+            'image', 'media_url', 'duration_weeks', 'days_per_week',
+            'is_active', 'days'
+        ]
+
+
 class UserEnrollmentSerializer(serializers.ModelSerializer):
-    program = WorkoutProgramListSerializer(read_only=True)
+    program = serializers.SerializerMethodField()
     program_id = serializers.UUIDField(write_only=True)
+    program_version = serializers.IntegerField(source='program_version.number', read_only=True)
 
     class Meta:
         model = UserEnrollment
         fields = [
-            'id', 'program', 'program_id', 'start_date', 'status',
+            'id', 'program', 'program_id', 'program_version', 'start_date', 'status',
             'current_week', 'current_day', 'created_at'
         ]
         read_only_fields = ['id', 'created_at', 'status', 'current_week', 'current_day']
 
+    def get_program(self, obj):
+        # Views serving the pinned version pass its program fields instead
+        if 'program_header' in self.context:
+            return self.context['program_header']
+        return WorkoutProgramListSerializer(obj.program).data
+
+
+class CohortFilterSerializer(serializers.Serializer):
+    """User fields a cohort can be selected by."""
+    is_active = serializers.BooleanField(required=False)
+    gender = serializers.ChoiceField(choices=User.Gender.choices, required=False)
+    fitness_goal = serializers.ChoiceField(choices=User.FitnessGoal.choices, required=False)
+    experience_level = serializers.ChoiceField(
+        choices=User.ExperienceLevel.choices, required=False
+    )
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict):
+            unknown = sorted(set(data) - set(self.fields))
+            if unknown:
+                raise serializers.ValidationError(
+                    f'Unknown filters: {", ".join(unknown)}. Allowed: {", ".join(self.fields)}.'
+                )
+        return super().to_internal_value(data)
+
+
+class CohortEnrollmentSerializer(serializers.Serializer):
+    """Users to enroll at once, given as ids or as a user filter."""
+    MAX_USERS = 5000
+
+    user_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        max_length=MAX_USERS
+    )
+    filters = CohortFilterSerializer(required=False)
+    start_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        # Empty filters alone would select every customer
+        if 'user_ids' not in attrs and not attrs.get('filters'):
+            raise serializers.ValidationError('Provide user_ids or at least one filter.')
+        return attrs
+
 
 class EnrollmentCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,110 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version, bump_program_version
+from .models import Exercise, WorkoutProgram, ProgramDay, DayExercise
+from .suggest import exercise_index
+
+
+# Set while defer_program_touches() is active: collects what to touch
+_deferred_touches = ContextVar('deferred_touches', default=None)
+
+
+@contextmanager
+def defer_program_touches():
+    """
+    Collect program changes made by per-row signals and touch each affected
+    program once on exit, instead of once per saved or deleted row.
+
+    Yields the set of program ids to touch, so bulk writes that send no
+    signals can add their programs to it.
+    """
+    if _deferred_touches.get() is not None:
+        yield _deferred_touches.get()['programs']
+        return
+
+    state = {'programs': set(), 'days': set()}
+    token = _deferred_touches.set(state)
+    try:
+        yield state['programs']
+    finally:
+        _deferred_touches.reset(token)
+
+    program_ids = state['programs'] | set(
+        ProgramDay.objects.filter(pk__in=state['days']).values_list('program_id', flat=True)
+    )
+    if program_ids:
+        WorkoutProgram.objects.filter(pk__in=program_ids).touch()
+
+
+def _program_id_for_day(day_id):
+    return ProgramDay.objects.filter(pk=day_id).values_list(
+        'program_id', flat=True
+    ).first()
+
+
+# Program summaries, document cache and validators
+@receiver(post_save, sender=WorkoutProgram)
+@receiver(post_delete, sender=WorkoutProgram)
+def bump_version_for_program(sender, instance, **kwargs):
+    transaction.on_commit(partial(bump_program_version, instance.pk))
+
+
+@receiver(post_save, sender=ProgramDay)
+@receiver(post_delete, sender=ProgramDay)
+def touch_program_for_day(sender, instance, origin=None, **kwargs):
+    # Deleting the whole program removes its summary too
+    if isinstance(origin, WorkoutProgram):
+        return
+    deferred = _deferred_touches.get()
+    if deferred is not None:
+        deferred['programs'].add(instance.program_id)
+        return
+    WorkoutProgram.objects.filter(pk=instance.program_id).touch()
+
+
+@receiver(post_save, sender=DayExercise)
+@receiver(post_delete, sender=DayExercise)
+def touch_program_for_day_exercise(sender, instance, origin=None, **kwargs):
+    # Cascades from a day or program are handled by their own receivers
+    if isinstance(origin, (WorkoutProgram, ProgramDay)):
+        return
+    deferred = _deferred_touches.get()
+    if deferred is not None:
+        deferred['days'].add(instance.day_id)
+        return
+    program_id = _program_id_for_day(instance.day_id)
+    if program_id:
+        WorkoutProgram.objects.filter(pk=program_id).touch()
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def touch_programs_for_exercise(sender, instance, **kwargs):
+    # Default sets and rest time feed the estimated session length
+    WorkoutProgram.objects.filter(days__exercises__exercise=instance).touch()
+
+
+# Catalog lookups (facet counts)
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+@receiver(post_save, sender=WorkoutProgram)
+@receiver(post_delete, sender=WorkoutProgram)
+def bump_catalog_version_for_change(sender, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+# Exercise autocomplete index
+@receiver(post_save, sender=Exercise)
+def update_suggest_index(sender, instance, **kwargs):
+    exercise_index.update(instance)
+
+
+@receiver(post_delete, sender=Exercise)
+def remove_from_suggest_index(sender, instance, **kwargs):
+    exercise_index.remove(instance.pk)
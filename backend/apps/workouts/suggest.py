@@ -0,0 +1,210 @@
+"""
+Process-local autocomplete index for exercise names.
+
+Names are stored in a prefix trie (one entry per word start, so "pre"
+finds "Bench Press") and a per-word trigram index that supplies
+candidates for typo-tolerant matching by edit distance. The index is
+built lazily from active exercises, patched by the signals in signals.py
+when this process changes an exercise, and fully rebuilt after
+EXERCISE_SUGGEST_TTL seconds so other worker processes catch up.
+"""
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count
+
+
+def normalize(text):
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def trigrams(text):
+    grams = set()
+    for word in text.split(' '):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def prefix_distance(a, b):
+    """
+    Edits needed to turn `a` into some prefix of `b`.
+
+    Uses optimal string alignment, so adjacent swaps count as one edit.
+    """
+    rows = [list(range(len(b) + 1))]
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            row[j] = min(rows[i - 1][j] + 1, row[j - 1] + 1, rows[i - 1][j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], rows[i - 2][j - 2] + 1)
+        rows.append(row)
+    return min(rows[-1])
+
+
+def word_starts(key):
+    words = key.split(' ')
+    return [' '.join(words[start:]) for start in range(len(words))]
+
+
+class ExerciseSuggestIndex:
+    @staticmethod
+    def max_distance(query):
+        """Typos allowed for a query: none for very short ones."""
+        if len(query) < 4:
+            return 0
+        return 1 if len(query) < 8 else 2
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held by the one thread rebuilding the index
+        self._rebuild_lock = threading.Lock()
+        self._built_at = None
+        self._entries = {}
+        self._trie = {}
+        self._trigrams = {}
+
+    def _insert(self, entry):
+        key = entry['key']
+        for suffix in word_starts(key):
+            node = self._trie
+            for char in suffix:
+                node = node.setdefault(char, {'ids': set()})
+                node['ids'].add(entry['id'])
+        for gram in trigrams(key):
+            self._trigrams.setdefault(gram, set()).add(entry['id'])
+        self._entries[entry['id']] = entry
+
+    def _remove(self, exercise_id):
+        entry = self._entries.pop(exercise_id, None)
+        if entry is None:
+            return
+        for suffix in word_starts(entry['key']):
+            node = self._trie
+            for char in suffix:
+                node = node.get(char)
+                if node is None:
+                    break
+                node['ids'].discard(exercise_id)
+        for gram in trigrams(entry['key']):
+            self._trigrams.get(gram, set()).discard(exercise_id)
+
+    @staticmethod
+    def _entry(exercise, popularity):
+        return {
+            'id': exercise.id,
+            'key': normalize(exercise.name),
+            'popularity': popularity,
+            'data': {
+                'id': str(exercise.id),
+                'name': exercise.name,
+                'muscle_group': exercise.muscle_group,
+                'category': exercise.category,
+                'equipment': exercise.equipment,
+            },
+        }
+
+    def build(self):
+        from .models import Exercise
+
+        exercises = list(Exercise.objects.filter(is_active=True).only(
+            'id', 'name', 'muscle_group', 'category', 'equipment'
+        ).annotate(popularity=Count('completions')))
+        with self._lock:
+            self._entries, self._trie, self._trigrams = {}, {}, {}
+            for exercise in exercises:
+                self._insert(self._entry(exercise, exercise.popularity))
+            self._built_at = time.monotonic()
+
+    def _is_stale(self):
+        ttl = settings.EXERCISE_SUGGEST_TTL
+        return self._built_at is None or time.monotonic() - self._built_at > ttl
+
+    def _ensure_built(self):
+        if not self._is_stale():
+            return
+        if self._built_at is None:
+            # Nothing to serve yet: wait for a single build
+            with self._rebuild_lock:
+                if self._built_at is None:
+                    self.build()
+            return
+        # Expired: one thread rebuilds while the others keep using the old index
+        if self._rebuild_lock.acquire(blocking=False):
+            try:
+                if self._is_stale():
+                    self.build()
+            finally:
+                self._rebuild_lock.release()
+
+    def invalidate(self):
+        """Force a rebuild on the next lookup, e.g. after bulk writes."""
+        self._built_at = None
+
+    def update(self, exercise):
+        """Add, refresh or drop a single exercise after it was saved."""
+        if self._built_at is None:
+            return
+        with self._lock:
+            previous = self._entries.get(exercise.id)
+            self._remove(exercise.id)
+            if exercise.is_active:
+                popularity = previous['popularity'] if previous else 0
+                self._insert(self._entry(exercise, popularity))
+
+    def remove(self, exercise_id):
+        if self._built_at is None:
+            return
+        with self._lock:
+            self._remove(exercise_id)
+
+    def suggest(self, query, limit=10):
+        self._ensure_built()
+        query = normalize(query)
+        if not query:
+            return []
+
+        with self._lock:
+            node = self._trie
+            for char in query:
+                node = node.get(char)
+                if node is None:
+                    break
+            prefix_ids = set(node['ids']) if node else set()
+
+            fuzzy_ids = set()
+            max_distance = self.max_distance(query)
+            if max_distance:
+                for gram in trigrams(query):
+                    fuzzy_ids.update(self._trigrams.get(gram, ()))
+
+            ranked = []
+            for exercise_id in prefix_ids | fuzzy_ids:
+                entry = self._entries[exercise_id]
+                key = entry['key']
+                if key.startswith(query):
+                    prefix_rank = 0
+                elif exercise_id in prefix_ids:
+                    prefix_rank = 1
+                else:
+                    prefix_rank = 2
+                window = len(query) + max_distance
+                distance, position = min(
+                    (prefix_distance(query, suffix[:window]), position)
+                    for position, suffix in enumerate(word_starts(key))
+                )
+                if prefix_rank == 2 and distance > max_distance:
+                    continue
+                ranked.append((
+                    prefix_rank, distance, position, -entry['popularity'], key, entry['data']
+                ))
+
+        ranked.sort(key=lambda item: item[:5])
+        return [item[5] for item in ranked[:limit]]
+
+
+exercise_index = ExerciseSuggestIndex()
@@ -0,0 +1,511 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.progress.models import WorkoutHistory
+from apps.users.models import User
+from .catalog import CatalogPackError, apply_pack
+from .maintenance import run_enrollment_maintenance
+from .models import (
+    Exercise, WorkoutProgram, ProgramDay, DayExercise, UserEnrollment, CatalogPackImport
+)
+from .serializers import CohortEnrollmentSerializer
+
+
+class ProgramTestCase(TestCase):
+    """Admin and customer clients with one program of 2 weeks x 2 days."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', password='pw', name='Admin', role='admin'
+        )
+        cls.customer = User.objects.create_user(
+            email='customer@example.com', password='pw', name='Customer'
+        )
+        cls.exercises = [
+            Exercise.objects.create(
+                name=f'Exercise {index}', muscle_group='chest',
+                category='strength', instructions='Lift.'
+            )
+            for index in range(4)
+        ]
+        cls.program = cls.create_program('Strength Basics')
+
+    @classmethod
+    def create_program(cls, name, weeks=2, days_per_week=2):
+        program = WorkoutProgram.objects.create(
+            name=name, description='Program.', goal='strength',
+            duration_weeks=weeks, days_per_week=days_per_week, created_by=cls.admin
+        )
+        for week_number in range(1, weeks + 1):
+            for day_number in range(1, days_per_week + 1):
+                day = ProgramDay.objects.create(
+                    program=program, week_number=week_number,
+                    day_number=day_number, day_name=f'Week {week_number} Day {day_number}'
+                )
+                for index in range(2):
+                    DayExercise.objects.create(
+                        day=day, exercise=cls.exercises[(day_number + index) % 4],
+                        order_index=index
+                    )
+        return program
+
+    def setUp(self):
+        cache.clear()
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(self.admin)
+        self.customer_client = APIClient()
+        self.customer_client.force_authenticate(self.customer)
+
+    def enroll(self, user=None, program=None):
+        return UserEnrollment.objects.create(
+            user=user or self.customer,
+            program=program or self.program,
+            start_date=date.today()
+        )
+
+
+class ProgramDetailCacheTests(ProgramTestCase):
+    def test_edit_invalidates_cached_detail(self):
+        url = reverse('program-detail', args=[self.program.pk])
+        self.assertEqual(self.client.get(url).data['name'], 'Strength Basics')
+
+        # Cache versions are bumped once the edit commits
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.admin_client.patch(url, {'name': 'Strength Plus'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get(url).data['name'], 'Strength Plus')
+
+
+class ProgramTreeUpdateTests(ProgramTestCase):
+    def test_swapping_day_slots_keeps_day_ids(self):
+        first, second = ProgramDay.objects.filter(
+            program=self.program, week_number=1
+        ).order_by('day_number')
+        days = [
+            {'id': str(first.pk), 'week_number': 1, 'day_number': 2, 'day_name': first.day_name},
+            {'id': str(second.pk), 'week_number': 1, 'day_number': 1, 'day_name': second.day_name},
+            {'week_number': 2, 'day_number': 1, 'day_name': 'Renamed Day', 'exercises': [
+                {'exercise_id': str(self.exercises[0].pk)},
+            ]},
+        ]
+
+        response = self.admin_client.patch(
+            reverse('program-detail', args=[self.program.pk]), {'days': days}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.week_number, first.day_number), (1, 2))
+        self.assertEqual((second.week_number, second.day_number), (1, 1))
+        # Days without an exercises key keep theirs; week 2 day 2 was dropped
+        self.assertEqual(first.exercises.count(), 2)
+        self.assertEqual(self.program.days.count(), 3)
+        # A day given without an id is matched to the one in its slot
+        matched = self.program.days.get(week_number=2, day_number=1)
+        self.assertEqual(matched.day_name, 'Renamed Day')
+        self.assertEqual(
+            list(matched.exercises.values_list('exercise_id', flat=True)),
+            [self.exercises[0].pk]
+        )
+
+
+    def patch_days(self, days):
+        response = self.admin_client.patch(
+            reverse('program-detail', args=[self.program.pk]), {'days': days}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def day(self, week_number, day_number):
+        return ProgramDay.objects.get(
+            program=self.program, week_number=week_number, day_number=day_number
+        )
+
+    def day_payload(self, day, **fields):
+        return {
+            'id': str(day.pk), 'week_number': day.week_number,
+            'day_number': day.day_number, 'day_name': day.day_name, **fields
+        }
+
+    def exercise_payload(self, day_exercise):
+        return {'id': str(day_exercise.pk), 'exercise_id': str(day_exercise.exercise_id)}
+
+    def test_moves_day_exercise_to_another_day_by_id(self):
+        source, target = self.day(1, 1), self.day(1, 2)
+        moved = source.exercises.order_by('order_index').first()
+        kept = source.exercises.exclude(pk=moved.pk).get()
+        target_exercises = list(target.exercises.order_by('order_index'))
+
+        self.patch_days([
+            self.day_payload(source, exercises=[self.exercise_payload(kept)]),
+            self.day_payload(target, exercises=[
+                self.exercise_payload(moved),
+                *(self.exercise_payload(item) for item in target_exercises),
+            ]),
+            self.day_payload(self.day(2, 1)),
+            self.day_payload(self.day(2, 2)),
+        ])
+
+        moved.refresh_from_db()
+        self.assertEqual((moved.day_id, moved.order_index), (target.pk, 0))
+        self.assertEqual(list(source.exercises.values_list('pk', 'order_index')), [(kept.pk, 0)])
+        self.assertEqual(
+            list(target.exercises.order_by('order_index').values_list('pk', flat=True)),
+            [moved.pk, *(item.pk for item in target_exercises)]
+        )
+
+    def test_deleted_day_keeps_exercises_claimed_elsewhere(self):
+        dropped, target = self.day(2, 2), self.day(2, 1)
+        rescued = dropped.exercises.order_by('order_index').first()
+
+        self.patch_days([
+            self.day_payload(self.day(1, 1)),
+            self.day_payload(self.day(1, 2)),
+            self.day_payload(target, exercises=[self.exercise_payload(rescued)]),
+        ])
+
+        self.assertFalse(ProgramDay.objects.filter(pk=dropped.pk).exists())
+        rescued.refresh_from_db()
+        self.assertEqual(rescued.day_id, target.pk)
+        self.assertEqual(list(target.exercises.values_list('pk', flat=True)), [rescued.pk])
+
+    def test_new_day_takes_a_freed_slot(self):
+        moved = self.day(2, 2)
+
+        # The new day comes first and wants the slot the moved day leaves
+        self.patch_days([
+            {'week_number': 2, 'day_number': 2, 'day_name': 'Fresh Day'},
+            self.day_payload(self.day(1, 1)),
+            self.day_payload(self.day(1, 2)),
+            self.day_payload(self.day(2, 1)),
+            self.day_payload(moved, week_number=3, day_number=1),
+        ])
+
+        moved.refresh_from_db()
+        self.assertEqual((moved.week_number, moved.day_number), (3, 1))
+        self.assertEqual(moved.exercises.count(), 2)
+        fresh = self.day(2, 2)
+        self.assertNotEqual(fresh.pk, moved.pk)
+        self.assertEqual(fresh.day_name, 'Fresh Day')
+        self.assertFalse(fresh.exercises.exists())
+
+    def test_partial_days_list_replaces_the_schedule(self):
+        kept = self.day(1, 1)
+        exercise_ids = set(kept.exercises.values_list('pk', flat=True))
+
+        self.patch_days([self.day_payload(kept, day_name='Only Day')])
+
+        self.assertEqual(list(self.program.days.values_list('pk', flat=True)), [kept.pk])
+        kept.refresh_from_db()
+        self.assertEqual(kept.day_name, 'Only Day')
+        # Without an exercises key the day keeps its exercises
+        self.assertEqual(set(kept.exercises.values_list('pk', flat=True)), exercise_ids)
+        self.assertEqual(DayExercise.objects.filter(day__program=self.program).count(), 2)
+
+
+class DayExerciseReorderTests(ProgramTestCase):
+    def reorder(self, day, exercise_ids):
+        return self.admin_client.post(
+            reverse('day-exercises-reorder', args=[day.pk]),
+            {'exercise_ids': [str(pk) for pk in exercise_ids]}, format='json'
+        )
+
+    def ordered(self, day):
+        return list(day.exercises.order_by('order_index').values_list('pk', 'order_index'))
+
+    def test_moves_exercises_across_days_and_renumbers_the_source(self):
+        target, source = self.program.days.filter(week_number=1).order_by('day_number')
+        first, second = target.exercises.order_by('order_index')
+        moved, left = source.exercises.order_by('order_index')
+
+        response = self.reorder(target, [second.pk, moved.pk, first.pk])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row['id'] for row in response.data],
+            [str(second.pk), str(moved.pk), str(first.pk)]
+        )
+        self.assertEqual(self.ordered(target), [(second.pk, 0), (moved.pk, 1), (first.pk, 2)])
+        self.assertEqual(self.ordered(source), [(left.pk, 0)])
+
+    def test_rejects_incomplete_or_foreign_lists(self):
+        day = self.program.days.get(week_number=1, day_number=1)
+        first, second = day.exercises.order_by('order_index')
+        other = self.create_program('Other Program')
+        foreign = DayExercise.objects.filter(day__program=other).first()
+
+        self.assertEqual(self.reorder(day, [second.pk]).status_code, 400)
+        self.assertEqual(self.reorder(day, [second.pk, first.pk, foreign.pk]).status_code, 400)
+        self.assertEqual(self.ordered(day), [(first.pk, 0), (second.pk, 1)])
+
+
+class ProgramCloneTests(ProgramTestCase):
+    def clone(self, **data):
+        response = self.admin_client.post(
+            reverse('program-clone', args=[self.program.pk]), data, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return WorkoutProgram.objects.get(pk=response.data['id'])
+
+    def weeks(self, program):
+        return sorted(set(program.days.values_list('week_number', flat=True)))
+
+    def test_copies_weeks_with_gaps_as_they_are(self):
+        ProgramDay.objects.filter(program=self.program, week_number=2).update(week_number=3)
+        WorkoutProgram.objects.filter(pk=self.program.pk).update(duration_weeks=3)
+
+        clone = self.clone()
+
+        self.assertEqual(self.weeks(clone), [1, 3])
+        self.assertEqual(clone.days.count(), 4)
+
+    def test_extending_repeats_source_weeks(self):
+        clone = self.clone(duration_weeks=3)
+
+        self.assertEqual(self.weeks(clone), [1, 2, 3])
+        self.assertEqual(
+            list(clone.days.filter(week_number=3).values_list('day_name', flat=True)),
+            ['Week 1 Day 1', 'Week 1 Day 2']
+        )
+
+
+class EnrollmentCalendarTests(ProgramTestCase):
+    def test_ics_calendar_lists_training_days(self):
+        enrollment = self.enroll()
+        url = reverse('enrollment-calendar', args=[enrollment.pk])
+
+        response = self.customer_client.get(url, {'format': 'ics'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/calendar'))
+        self.assertEqual(response.content.decode().count('BEGIN:VEVENT'), 4)
+
+    def test_calendar_follows_the_pinned_version(self):
+        enrollment = self.enroll()
+        self.customer_client.get(reverse('today-workout'))
+        only_day = self.program.days.get(week_number=1, day_number=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_client.patch(reverse('program-detail', args=[self.program.pk]), {
+                'days_per_week': 1,
+                'days': [{'id': str(only_day.pk), 'week_number': 1, 'day_number': 1,
+                          'day_name': 'Only day'}],
+            }, format='json')
+
+        today = self.customer_client.get(reverse('today-workout')).data
+        calendar = self.customer_client.get(
+            reverse('enrollment-calendar', args=[enrollment.pk])
+        ).data
+
+        self.assertEqual(today['day']['day_name'], 'Week 1 Day 1')
+        self.assertEqual(len(calendar['days']), 4)
+        self.assertEqual(calendar['days'][0]['day_id'], today['day']['id'])
+        self.assertEqual(calendar['days'][0]['day_name'], 'Week 1 Day 1')
+        # Two days a week, as pinned: day 2 falls 3 days after day 1
+        first, second = calendar['days'][:2]
+        self.assertEqual((second['date'] - first['date']).days, 3)
+
+    def test_ics_errors_are_rendered_as_json(self):
+        url = reverse('enrollment-calendar', args=[self.program.pk])
+
+        response = self.customer_client.get(url, {'format': 'ics'})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(response['Content-Type'].startswith('application/json'))
+        self.assertEqual(response.json(), {'error': 'Enrollment not found'})
+
+
+class CatalogPackTests(ProgramTestCase):
+    def test_reschedule_keeps_day_ids(self):
+        day_ids = set(self.program.days.values_list('pk', flat=True))
+        days = [
+            {
+                'week_number': day.week_number,
+                'day_number': day.day_number,
+                'day_name': day.day_name,
+                'exercises': [{'exercise': 'Exercise 3', 'custom_reps': '5'}],
+            }
+            for day in self.program.days.all()
+        ]
+        pack = {'version': '2026.10', 'programs': [{
+            'name': 'Strength Basics', 'description': 'Program.', 'goal': 'strength',
+            'duration_weeks': 2, 'days_per_week': 2, 'days': days,
+        }]}
+
+        report = apply_pack(pack)
+
+        self.assertEqual(report['programs']['updated'], 1)
+        self.assertEqual(set(self.program.days.values_list('pk', flat=True)), day_ids)
+        self.assertEqual(
+            set(DayExercise.objects.filter(day__program=self.program).values_list(
+                'exercise__name', 'custom_reps'
+            )),
+            {('Exercise 3', '5')}
+        )
+
+
+    def new_pack(self, version='2026.11'):
+        return {
+            'version': version,
+            'exercises': [
+                {'name': 'Exercise 0', 'muscle_group': 'chest', 'category': 'strength',
+                 'instructions': 'Lift slowly.'},
+                {'name': 'Goblet Squat', 'muscle_group': 'legs', 'category': 'strength',
+                 'instructions': 'Squat.'},
+            ],
+            'programs': [{
+                'name': 'Leg Day', 'description': 'Legs.', 'goal': 'strength',
+                'duration_weeks': 1, 'days_per_week': 1,
+                'days': [{'week_number': 1, 'day_number': 1, 'day_name': 'Legs',
+                          'exercises': [{'exercise': 'Goblet Squat'}]}],
+            }],
+        }
+
+    def test_dry_run_reports_diff_without_writing(self):
+        report = apply_pack(self.new_pack(), dry_run=True)
+
+        self.assertEqual(report['exercises'], {'inserted': 1, 'updated': 1, 'unchanged': 0})
+        self.assertEqual(report['programs'], {'inserted': 1, 'updated': 0, 'unchanged': 0})
+        self.assertFalse(Exercise.objects.filter(name='Goblet Squat').exists())
+        self.assertEqual(Exercise.objects.get(name='Exercise 0').instructions, 'Lift.')
+        self.assertFalse(CatalogPackImport.objects.exists())
+
+    def test_reapplying_a_pack_is_idempotent(self):
+        apply_pack(self.new_pack())
+        counts = (Exercise.objects.count(), WorkoutProgram.objects.count(), DayExercise.objects.count())
+
+        report = apply_pack(self.new_pack())
+
+        self.assertEqual(report['exercises'], {'inserted': 0, 'updated': 0, 'unchanged': 2})
+        self.assertEqual(report['programs'], {'inserted': 0, 'updated': 0, 'unchanged': 1})
+        self.assertEqual(
+            (Exercise.objects.count(), WorkoutProgram.objects.count(), DayExercise.objects.count()),
+            counts
+        )
+        self.assertEqual(CatalogPackImport.objects.count(), 1)
+
+        changed = self.new_pack()
+        changed['exercises'][1]['instructions'] = 'Squat deep.'
+        with self.assertRaises(CatalogPackError):
+            apply_pack(changed)
+
+    def test_rejects_sections_that_are_not_lists(self):
+        url = reverse('exercise-catalog-pack')
+        for exercises in (None, 'squat', {'name': 'Squat'}):
+            response = self.admin_client.post(
+                url, {'version': '2026.12', 'exercises': exercises},
+                format='json'
+            )
+            self.assertEqual(response.status_code, 400, exercises)
+            self.assertEqual(list(response.data), ['exercises'])
+
+        response = self.admin_client.post(
+            url, {'version': '2026.12', 'exercises': ['squat']}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(0, response.data['exercises'])
+
+
+class PinnedProgramTests(ProgramTestCase):
+    def test_responses_include_live_enrollment_count(self):
+        self.enroll()
+        self.customer_client.get(reverse('current-program'))
+        other = User.objects.create_user(email='other@example.com', password='pw', name='Other')
+        self.enroll(user=other)
+
+        current = self.customer_client.get(reverse('current-program')).data
+        today = self.customer_client.get(reverse('today-workout')).data
+        detail = self.client.get(reverse('program-detail', args=[self.program.pk])).data
+
+        self.assertEqual(current['enrollment']['program']['enrollment_count'], 2)
+        self.assertEqual(current['program']['enrollment_count'], 2)
+        self.assertEqual(today['enrollment']['program']['enrollment_count'], 2)
+        self.assertEqual(detail['enrollment_count'], 2)
+
+
+class EnrollmentMaintenanceTests(ProgramTestCase):
+    def test_completes_against_the_pinned_duration(self):
+        enrollment = self.enroll()
+        self.customer_client.get(reverse('today-workout'))
+        # The live program grows after the enrollment pinned 2 weeks
+        WorkoutProgram.objects.filter(pk=self.program.pk).update(duration_weeks=5)
+        UserEnrollment.objects.filter(pk=enrollment.pk).update(current_week=3)
+
+        report = run_enrollment_maintenance(stale_days=14, expire_days=90)
+
+        self.assertEqual(report['completed'], 1)
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.status, 'completed')
+        self.assertEqual(enrollment.program_version.duration_weeks, 2)
+
+
+    def test_workout_logged_after_selection_keeps_enrollment_active(self):
+        enrollment = self.enroll()
+        UserEnrollment.objects.filter(pk=enrollment.pk).update(
+            start_date=date.today() - timedelta(days=30)
+        )
+
+        def select_then_log_workout(rows):
+            # A workout lands between the candidate SELECT and the UPDATE
+            selected = [*rows]
+            if selected:
+                WorkoutHistory.objects.create(user=self.customer, program=self.program)
+            return selected
+
+        with mock.patch('apps.workouts.maintenance.list', select_then_log_workout, create=True):
+            report = run_enrollment_maintenance(stale_days=14, expire_days=90)
+
+        self.assertEqual(report['paused'], 0)
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.status, 'active')
+
+
+class CohortEnrollTests(ProgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('program-enroll-cohort', args=[self.program.pk])
+
+    def test_reports_conflicts_and_unknown_users(self):
+        self.enroll()
+        newcomer = User.objects.create_user(
+            email='new@example.com', password='pw', name='New', gender='female'
+        )
+        unknown = '00000000-0000-0000-0000-000000000000'
+
+        response = self.admin_client.post(self.url, {
+            'user_ids': [str(self.customer.pk), str(newcomer.pk), unknown],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        statuses = {str(row['user_id']): row['status'] for row in response.data['results']}
+        self.assertEqual(statuses, {
+            str(self.customer.pk): 'already_enrolled',
+            str(newcomer.pk): 'enrolled',
+            unknown: 'not_found',
+        })
+        self.assertEqual(
+            UserEnrollment.objects.filter(program=self.program, status='active').count(), 2
+        )
+
+    def test_rejects_invalid_filter_values(self):
+        for filters in ({'is_active': 'maybe'}, {'gender': ['male']}, {'level': 'x'}, {}):
+            response = self.admin_client.post(self.url, {'filters': filters}, format='json')
+            self.assertEqual(response.status_code, 400, filters)
+        self.assertFalse(UserEnrollment.objects.exists())
+
+    @mock.patch.object(CohortEnrollmentSerializer, 'MAX_USERS', 1)
+    def test_caps_filter_selected_cohort(self):
+        User.objects.create_user(email='new@example.com', password='pw', name='New')
+
+        response = self.admin_client.post(
+            self.url, {'filters': {'is_active': True}}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UserEnrollment.objects.exists())
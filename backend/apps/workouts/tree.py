@@ -0,0 +1,141 @@
+"""
+Diff-and-apply for a program's full day / day-exercise tree.
+
+`apply_program_days` takes the desired schedule (validated
+ProgramDayCreateSerializer data) and turns it into a fixed number of bulk
+statements: delete, bulk_update, bulk_create. Days are matched by `id` when
+given, otherwise by (week_number, day_number). Day exercises are matched
+by `id` (which may move them to another day), otherwise by exercise within
+the day in order. A day without an `exercises` key keeps its exercises.
+"""
+from .models import ProgramDay, DayExercise
+
+
+DAY_FIELDS = ['week_number', 'day_number', 'day_name', 'description', 'is_rest_day']
+DAY_EXERCISE_FIELDS = [
+    'day_id', 'exercise_id', 'order_index', 'custom_sets',
+    'custom_reps', 'custom_rest_time', 'notes'
+]
+
+# Days that change slot are parked above this week number first, so that
+# swapping two days never trips the (program, week, day) unique constraint
+TEMP_WEEK_OFFSET = 1000000
+
+
+def _assign(instance, fields):
+    changed = False
+    for key, value in fields.items():
+        if getattr(instance, key) != value:
+            setattr(instance, key, value)
+            changed = True
+    return changed
+
+
+def apply_program_days(program, days_data, batch_size=500):
+    """Make the program's stored days match `days_data`. Returns change counts."""
+    existing_days = {day.pk: day for day in ProgramDay.objects.filter(program=program)}
+    existing_exercises = {
+        day_exercise.pk: day_exercise
+        for day_exercise in DayExercise.objects.filter(day__program=program)
+    }
+    by_slot = {(day.week_number, day.day_number): day for day in existing_days.values()}
+
+    # Match days. Days named by id keep their identity even when a day
+    # listed before them, without an id, asks for their old slot
+    named = {day_data.get('id') for day_data in days_data}
+    matched_days, new_days, changed_days, plan = set(), [], [], []
+    for day_data in days_data:
+        day_data = dict(day_data)
+        exercises_data = day_data.pop('exercises', None)
+        day = existing_days.get(day_data.pop('id', None))
+        if day is None:
+            day = by_slot.get((day_data['week_number'], day_data['day_number']))
+            if day is not None and day.pk in named:
+                day = None
+        if day is None or day.pk in matched_days:
+            day = ProgramDay(program=program, **day_data)
+            new_days.append(day)
+        else:
+            matched_days.add(day.pk)
+            original_slot = (day.week_number, day.day_number)
+            if _assign(day, day_data):
+                changed_days.append((day, original_slot))
+        plan.append((day, exercises_data))
+    deleted_days = [pk for pk in existing_days if pk not in matched_days]
+
+    # Match day exercises
+    claimed, new_exercises, changed_exercises = set(), [], []
+    replaced_days = set(deleted_days)
+    for day, exercises_data in plan:
+        if exercises_data is None:
+            continue
+        replaced_days.add(day.pk)
+        available = sorted(
+            (
+                day_exercise for day_exercise in existing_exercises.values()
+                if day_exercise.day_id == day.pk
+            ),
+            key=lambda day_exercise: day_exercise.order_index
+        )
+        for index, exercise_data in enumerate(exercises_data):
+            fields = {'order_index': index, **exercise_data}
+            target = existing_exercises.get(fields.pop('id', None))
+            if target is None or target.pk in claimed:
+                target = next(
+                    (
+                        day_exercise for day_exercise in available
+                        if day_exercise.exercise_id == fields['exercise_id']
+                        and day_exercise.pk not in claimed
+                    ),
+                    None
+                )
+            if target is None:
+                new_exercises.append(DayExercise(day=day, **fields))
+                continue
+            claimed.add(target.pk)
+            if _assign(target, {'day_id': day.pk, **fields}):
+                changed_exercises.append(target)
+    deleted_exercises = [
+        pk for pk, day_exercise in existing_exercises.items()
+        if day_exercise.day_id in replaced_days and pk not in claimed
+    ]
+
+    # Apply: free slots, create, update, then drop what is left over
+    if deleted_exercises:
+        DayExercise.objects.filter(pk__in=deleted_exercises).delete()
+
+    parked = [
+        ProgramDay(pk=pk, week_number=TEMP_WEEK_OFFSET + index)
+        for index, pk in enumerate(
+            deleted_days + [day.pk for day, slot in changed_days
+                            if slot != (day.week_number, day.day_number)]
+        )
+    ]
+    if parked:
+        ProgramDay.objects.bulk_update(parked, ['week_number'], batch_size=batch_size)
+
+    ProgramDay.objects.bulk_create(new_days, batch_size=batch_size)
+    if changed_days:
+        ProgramDay.objects.bulk_update(
+            [day for day, slot in changed_days], DAY_FIELDS, batch_size=batch_size
+        )
+    if changed_exercises:
+        DayExercise.objects.bulk_update(
+            changed_exercises, DAY_EXERCISE_FIELDS, batch_size=batch_size
+        )
+    DayExercise.objects.bulk_create(new_exercises, batch_size=batch_size)
+    if deleted_days:
+        ProgramDay.objects.filter(pk__in=deleted_days).delete()
+
+    return {
+        'days': {
+            'inserted': len(new_days),
+            'updated': len(changed_days),
+            'deleted': len(deleted_days),
+        },
+        'exercises': {
+            'inserted': len(new_exercises),
+            'updated': len(changed_exercises),
+            'deleted': len(deleted_exercises),
+        },
+    }
@@ -1,7 +1,16 @@
 from django.urls import path
-from .views import ExerciseListCreateView, ExerciseDetailView
+from .views import (
+    ExerciseListCreateView,
+    ExerciseFacetView,
+    CatalogPackView,
+    ExerciseSuggestView,
+    ExerciseDetailView,
+)
 
 urlpatterns = [
     path('', ExerciseListCreateView.as_view(), name='exercise-list'),
+    path('facets/', ExerciseFacetView.as_view(), name='exercise-facets'),
+    path('catalog-pack/', CatalogPackView.as_view(), name='exercise-catalog-pack'),
+    path('suggest/', ExerciseSuggestView.as_view(), name='exercise-suggest'),
     path('<uuid:pk>/', ExerciseDetailView.as_view(), name='exercise-detail'),
 ]
@@ -1,12 +1,18 @@
 from django.urls import path
 from .views import (
     ProgramListCreateView,
+    ProgramFacetView,
     ProgramDetailView,
+    ProgramWeekView,
+    ProgramCloneView,
     ProgramDayListCreateView,
     DayExerciseListCreateView,
+    DayExerciseReorderView,
     EnrollmentListCreateView,
     EnrollmentDetailView,
+    EnrollmentCalendarView,
     EnrollInProgramView,
+    CohortEnrollView,
     CurrentProgramView,
     TodayWorkoutView,
     ProgramStatsView,
@@ -14,13 +20,19 @@ from .views import (
 
 urlpatterns = [
     path('', ProgramListCreateView.as_view(), name='program-list'),
+    path('facets/', ProgramFacetView.as_view(), name='program-facets'),
     path('stats/', ProgramStatsView.as_view(), name='program-stats'),
     path('current/', CurrentProgramView.as_view(), name='current-program'),
     path('today/', TodayWorkoutView.as_view(), name='today-workout'),
     path('enrollments/', EnrollmentListCreateView.as_view(), name='enrollment-list'),
     path('enrollments/<uuid:pk>/', EnrollmentDetailView.as_view(), name='enrollment-detail'),
+    path('enrollments/<uuid:pk>/calendar/', EnrollmentCalendarView.as_view(), name='enrollment-calendar'),
     path('<uuid:pk>/', ProgramDetailView.as_view(), name='program-detail'),
+    path('<uuid:pk>/weeks/<int:week_number>/', ProgramWeekView.as_view(), name='program-week'),
+    path('<uuid:pk>/clone/', ProgramCloneView.as_view(), name='program-clone'),
     path('<uuid:pk>/enroll/', EnrollInProgramView.as_view(), name='program-enroll'),
+    path('<uuid:pk>/enroll/cohort/', CohortEnrollView.as_view(), name='program-enroll-cohort'),
     path('<uuid:program_id>/days/', ProgramDayListCreateView.as_view(), name='program-days'),
     path('days/<uuid:day_id>/exercises/', DayExerciseListCreateView.as_view(), name='day-exercises'),
+    path('days/<uuid:day_id>/exercises/reorder/', DayExerciseReorderView.as_view(), name='day-exercises-reorder'),
 ]
@@ -0,0 +1,160 @@
+"""
+Copy-on-write program versions.
+
+A version freezes the full program document (WorkoutProgramSerializer with
+every day and exercise) as JSON, identified by a hash of its content.
+Versions are captured lazily: current_version() compares the program's
+updated_at, which every edit moves (see WorkoutProgramQuerySet.touch),
+with the newest version and only serializes the tree again when the
+program changed since. Unchanged content reuses the existing version.
+
+Enrollments pin the version they started on, so later edits never change
+a running enrollment, and version documents can be cached forever.
+"""
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max
+
+from .cache import get_or_build_document
+from .models import WorkoutProgram, ProgramVersion, UserEnrollment
+from .serializers import WorkoutProgramSerializer, WorkoutProgramListSerializer
+
+
+# Live values that do not belong in a frozen document
+VOLATILE_FIELDS = ['enrollment_count']
+HEADER_FIELDS = [
+    field for field in WorkoutProgramListSerializer.Meta.fields
+    if field not in VOLATILE_FIELDS
+]
+
+
+def build_document(program_id):
+    program = WorkoutProgram.objects.select_related('summary', 'created_by').prefetch_related(
+        'days__exercises__exercise'
+    ).get(pk=program_id)
+    document = dict(WorkoutProgramSerializer(program).data)
+    for field in VOLATILE_FIELDS:
+        document.pop(field, None)
+    # Store plain JSON types so the hash matches what is read back
+    return json.loads(json.dumps(document, cls=DjangoJSONEncoder))
+
+
+def content_hash(document):
+    canonical = json.dumps(document, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def current_version(program):
+    """Return the version matching the program as it is now, capturing it if needed."""
+    latest = ProgramVersion.objects.filter(program_id=program.pk).defer(
+        'document'
+    ).order_by('-program_updated_at').first()
+    if latest is not None and latest.program_updated_at >= program.updated_at:
+        return latest
+
+    with transaction.atomic():
+        # Serialize captures of the same program and read the edit stamp
+        # the snapshot will correspond to
+        updated_at = WorkoutProgram.objects.select_for_update().filter(
+            pk=program.pk
+        ).values_list('updated_at', flat=True).get()
+        document = build_document(program.pk)
+        digest = content_hash(document)
+
+        version = ProgramVersion.objects.filter(
+            program_id=program.pk,
+            content_hash=digest
+        ).defer('document').first()
+        if version is None:
+            number = ProgramVersion.objects.filter(program_id=program.pk).aggregate(
+                number=Max('number')
+            )['number'] or 0
+            version = ProgramVersion.objects.create(
+                program_id=program.pk,
+                number=number + 1,
+                content_hash=digest,
+                document=document,
+                duration_weeks=document['duration_weeks'],
+                days_per_week=document['days_per_week'],
+                program_updated_at=updated_at
+            )
+        else:
+            ProgramVersion.objects.filter(pk=version.pk).update(program_updated_at=updated_at)
+            version.program_updated_at = updated_at
+    return version
+
+
+def pinned_version(enrollment):
+    """Return the enrollment's version, pinning the current one if it has none."""
+    if enrollment.program_version_id is None:
+        enrollment.program_version = current_version(enrollment.program)
+        # update() leaves updated_at alone, which keys the enrollment calendar
+        UserEnrollment.objects.filter(
+            pk=enrollment.pk,
+            program_version__isnull=True
+        ).update(program_version=enrollment.program_version)
+    return enrollment.program_version
+
+
+def version_document(version):
+    return get_or_build_document(
+        version.content_hash,
+        'program',
+        lambda: ProgramVersion.objects.values_list('document', flat=True).get(pk=version.pk)
+    )
+
+
+def version_header(version):
+    """Program fields of a version without the schedule."""
+    def build():
+        document = version_document(version)
+        return {field: document[field] for field in HEADER_FIELDS}
+    return get_or_build_document(version.content_hash, 'header', build)
+
+
+def live_fields(program_id):
+    """Current values of VOLATILE_FIELDS, merged into served documents."""
+    return {
+        'enrollment_count': UserEnrollment.objects.filter(
+            program_id=program_id,
+            status='active'
+        ).count(),
+    }
+
+
+def version_day_slot(version, day_id):
+    """
+    (week_number, day_number) of a day in a version's schedule, or None.
+
+    Live days can be deleted or recreated after a version was captured, so
+    completions refer to the slot rather than to the stored day id.
+    """
+    def build():
+        return {
+            day['id']: [day['week_number'], day['day_number']]
+            for day in version_document(version)['days']
+        }
+    slot = get_or_build_document(version.content_hash, 'day-slots', build).get(str(day_id))
+    return tuple(slot) if slot else None
+
+
+def normalize_exercises(days):
+    """
+    Rewrite serialized days so exercises are referenced by exercise_id and
+    return them with the map of distinct exercises.
+    """
+    exercise_map = {}
+    normalized = []
+    for day in days:
+        exercises = []
+        for item in day['exercises']:
+            item = dict(item)
+            exercise = item.pop('exercise')
+            item['exercise_id'] = exercise['id']
+            exercise_map.setdefault(exercise['id'], exercise)
+            exercises.append(item)
+        normalized.append({**day, 'exercises': exercises})
+    return normalized, exercise_map
@@ -2,8 +2,12 @@ from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Prefetch, Sum
 from django.utils import timezone
 
 from .models import Exercise, WorkoutProgram, ProgramDay, DayExercise, UserEnrollment
@@ -11,20 +15,47 @@ from .serializers import (
     ExerciseSerializer,
     ExerciseListSerializer,
     WorkoutProgramSerializer,
+    WorkoutProgramOutlineSerializer,
     WorkoutProgramListSerializer,
     WorkoutProgramCreateSerializer,
+    ProgramCloneSerializer,
+    DayExerciseReorderSerializer,
     ProgramDaySerializer,
     DayExerciseSerializer,
     UserEnrollmentSerializer,
     EnrollmentCreateSerializer,
+    CohortEnrollmentSerializer,
 )
+from .cache import get_or_build, get_or_build_catalog, get_or_build_document
+from .catalog import CatalogPackError, apply_pack, parse_pack
+from .cohorts import CohortTooLargeError, enroll_cohort
+from .filters import FullTextSearchFilter
+from .mixins import ConditionalGetMixin
+from .renderers import ICalendarRenderer
+from .schedule import build_calendar
+from .versions import (
+    current_version, live_fields, normalize_exercises, pinned_version, version_document,
+    version_header
+)
+from .suggest import exercise_index
 from apps.users.permissions import IsAdmin
+from config.fieldsets import SparseQuerysetMixin, fieldset_cache_name
 
 
 # Exercise Views
-class ExerciseListCreateView(generics.ListCreateAPIView):
-    queryset = Exercise.objects.filter(is_active=True)
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+def exercise_map_context(request):
+    """
+    ?exercises=map renders day exercises with only an exercise_id and
+    collects each exercise once into a map for a top-level `exercises` key.
+    """
+    if request.query_params.get('exercises') == 'map':
+        return {'exercise_map': {}}
+    return {}
+
+
+class ExerciseListCreateView(ConditionalGetMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
+    queryset = Exercise.objects.filter(is_active=True).defer('search_vector')
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
     filterset_fields = ['muscle_group', 'category', 'gender_focus', 'equipment', 'difficulty']
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
@@ -43,7 +74,89 @@ class ExerciseListCreateView(generics.ListCreateAPIView):
         serializer.save()
 
 
-class ExerciseDetailView(generics.RetrieveUpdateDestroyAPIView):
+class FacetCountView(generics.GenericAPIView):
+    """
+    Per-value counts for every facet under the current filter and search.
+
+    All facets come from one query grouped by the full facet combination,
+    summed per facet in Python, and cached per query string.
+    """
+    permission_classes = [AllowAny]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    facet_fields = []
+
+    def get_facets(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.order_by().values(*self.facet_fields).annotate(count=Count('pk'))
+
+        facets = {}
+        for field_name in self.facet_fields:
+            field = self.get_queryset().model._meta.get_field(field_name)
+            counts = {value: 0 for value, label in field.choices or []}
+            for row in rows:
+                counts[row[field_name]] = counts.get(row[field_name], 0) + row['count']
+            labels = dict(field.choices or [])
+            facets[field_name] = [
+                {'value': value, 'label': labels.get(value, str(value)), 'count': count}
+                for value, count in counts.items()
+            ]
+            if not field.choices:
+                facets[field_name].sort(key=lambda item: item['value'])
+        return facets
+
+    def get(self, request):
+        name = self.get_queryset().model._meta.model_name
+        return Response(get_or_build_catalog(
+            f'{name}-facets', request.query_params.lists(), self.get_facets
+        ))
+
+
+class ExerciseFacetView(FacetCountView):
+    queryset = Exercise.objects.filter(is_active=True)
+    filterset_fields = ['muscle_group', 'category', 'gender_focus', 'equipment', 'difficulty']
+    search_fields = ['name', 'description']
+    facet_fields = filterset_fields
+
+
+class CatalogPackView(APIView):
+    """
+    Apply a versioned catalog pack (JSON or NDJSON body).
+
+    Pass ?dry_run=true to get the inserted/updated/unchanged counts without
+    writing anything.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    parser_classes = []
+
+    def post(self, request):
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        try:
+            pack = parse_pack(request.body.decode('utf-8'))
+            report = apply_pack(pack, dry_run=dry_run, user=request.user)
+        except UnicodeDecodeError:
+            return Response(
+                {'error': 'Pack must be UTF-8 encoded'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except CatalogPackError as exc:
+            return Response(exc.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(report, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+
+class ExerciseSuggestView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 25)
+        except ValueError:
+            limit = 10
+        query = request.query_params.get('q', '')
+        return Response(exercise_index.suggest(query, limit=max(limit, 1)))
+
+
+class ExerciseDetailView(ConditionalGetMixin, SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Exercise.objects.all()
     serializer_class = ExerciseSerializer
 
@@ -54,12 +167,16 @@ class ExerciseDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # Workout Program Views
-class ProgramListCreateView(generics.ListCreateAPIView):
-    queryset = WorkoutProgram.objects.filter(is_active=True)
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+class ProgramListCreateView(ConditionalGetMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
+    # Meta.ordering is not applied to aggregated (GROUP BY) querysets
+    queryset = WorkoutProgram.objects.filter(
+        is_active=True
+    ).defer('search_vector').with_enrollment_count().order_by('-created_at')
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
     filterset_fields = ['goal', 'gender_focus', 'difficulty', 'duration_weeks']
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at', 'duration_weeks']
+    conditional_aggregates = {'enrollments': Sum('active_enrollment_count')}
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -75,8 +192,31 @@ class ProgramListCreateView(generics.ListCreateAPIView):
         serializer.save(created_by=self.request.user)
 
 
-class ProgramDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = WorkoutProgram.objects.prefetch_related('days__exercises__exercise', 'enrollments').all()
+class ProgramFacetView(FacetCountView):
+    queryset = WorkoutProgram.objects.filter(is_active=True)
+    filterset_fields = ['goal', 'gender_focus', 'difficulty', 'duration_weeks']
+    search_fields = ['name', 'description']
+    facet_fields = filterset_fields
+
+
+class ProgramDetailView(ConditionalGetMixin, SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
+    conditional_aggregates = {'enrollments': Sum('active_enrollment_count')}
+
+    def expand_days(self):
+        # ?expand=days returns every day with its exercises in one response
+        return self.request.query_params.get('expand') == 'days'
+
+    def get_queryset(self):
+        # Enrollments are only ever counted, never loaded
+        queryset = WorkoutProgram.objects.select_related('summary').with_enrollment_count()
+        if self.request.method == 'GET' and not self.expand_days():
+            return queryset.prefetch_related(Prefetch(
+                'days',
+                queryset=ProgramDay.objects.annotate(
+                    exercise_count=Count('exercises')
+                ).order_by('week_number', 'day_number')
+            ))
+        return queryset.prefetch_related('days__exercises__exercise')
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -85,9 +225,101 @@ class ProgramDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
-            return WorkoutProgramSerializer
+            if self.expand_days():
+                return WorkoutProgramSerializer
+            return WorkoutProgramOutlineSerializer
         return WorkoutProgramCreateSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        program_id = kwargs['pk']
+        context = exercise_map_context(request) if self.expand_days() else {}
+
+        def build():
+            serializer = self.get_serializer_class()(
+                self.get_object(),
+                context={**self.get_serializer_context(), **context}
+            )
+            data = dict(serializer.data)
+            if 'exercise_map' in context:
+                data['exercises'] = context['exercise_map']
+            return data
+
+        name = 'detail' if self.expand_days() else 'outline'
+        if context:
+            name = f'{name}:map'
+        name += fieldset_cache_name(request)
+        data = dict(get_or_build(program_id, name, build))
+        # Enrollment counts change independently of the program structure
+        if 'enrollment_count' in data:
+            data['enrollment_count'] = UserEnrollment.objects.filter(
+                program_id=program_id,
+                status='active'
+            ).count()
+        return Response(data)
+
+
+class ProgramWeekView(ConditionalGetMixin, generics.RetrieveAPIView):
+    """Full schedule for one week of a program, see ProgramDetailView's outline."""
+    queryset = WorkoutProgram.objects.all()
+    permission_classes = [AllowAny]
+
+    def retrieve(self, request, *args, **kwargs):
+        program_id = kwargs['pk']
+        week_number = kwargs['week_number']
+
+        context = exercise_map_context(request)
+
+        def build():
+            days = ProgramDay.objects.filter(
+                program_id=program_id,
+                week_number=week_number
+            ).prefetch_related('exercises__exercise')
+            data = {'days': list(ProgramDaySerializer(days, many=True, context=context).data)}
+            if 'exercise_map' in context:
+                data['exercises'] = context['exercise_map']
+            return data
+
+        name = f'week:{week_number}:map' if context else f'week:{week_number}'
+        data = get_or_build(program_id, name, build)
+        if not data['days']:
+            return Response(
+                {'error': 'Week not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({
+            'program_id': program_id,
+            'week_number': week_number,
+            **data,
+        })
+
+
+class ProgramCloneView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def post(self, request, pk):
+        try:
+            program = WorkoutProgram.objects.get(pk=pk)
+        except WorkoutProgram.DoesNotExist:
+            return Response(
+                {'error': 'Program not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = ProgramCloneSerializer(
+            data=request.data,
+            context={'request': request, 'program': program}
+        )
+        if serializer.is_valid():
+            clone = serializer.save()
+            clone = WorkoutProgram.objects.select_related('summary').prefetch_related(
+                'days__exercises__exercise'
+            ).get(pk=clone.pk)
+            return Response(
+                WorkoutProgramSerializer(clone).data,
+                status=status.HTTP_201_CREATED
+            )
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
 
 class ProgramDayListCreateView(generics.ListCreateAPIView):
     serializer_class = ProgramDaySerializer
@@ -115,25 +347,93 @@ class DayExerciseListCreateView(generics.ListCreateAPIView):
         serializer.save(day_id=day_id)
 
 
+class DayExerciseReorderView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def post(self, request, day_id):
+        try:
+            day = ProgramDay.objects.get(pk=day_id)
+        except ProgramDay.DoesNotExist:
+            return Response(
+                {'error': 'Day not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = DayExerciseReorderSerializer(data=request.data, context={'day': day})
+        if serializer.is_valid():
+            serializer.save()
+            exercises = DayExercise.objects.filter(day=day).select_related('exercise')
+            return Response(DayExerciseSerializer(exercises, many=True).data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 # Enrollment Views
 class EnrollmentListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return UserEnrollment.objects.filter(user=self.request.user)
+        return UserEnrollment.objects.filter(user=self.request.user).with_program()
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return UserEnrollmentSerializer
         return EnrollmentCreateSerializer
 
+    def perform_create(self, serializer):
+        # Pin the program as it is now
+        serializer.save(program_version=current_version(serializer.validated_data['program']))
+
+    def create(self, request, *args, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().create(request, *args, **kwargs)
+        except IntegrityError:
+            return Response(
+                {'error': 'Already enrolled in this program'},
+                status=status.HTTP_409_CONFLICT
+            )
+
 
 class EnrollmentDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UserEnrollmentSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return UserEnrollment.objects.filter(user=self.request.user)
+        return UserEnrollment.objects.filter(user=self.request.user).with_program()
+
+
+class EnrollmentCalendarView(APIView):
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ICalendarRenderer]
+
+    def get(self, request, pk):
+        try:
+            enrollment = UserEnrollment.objects.select_related('program_version').defer(
+                'program_version__document'
+            ).get(pk=pk, user=request.user)
+        except UserEnrollment.DoesNotExist:
+            return Response(
+                {'error': 'Enrollment not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # The calendar follows the pinned version. Completions save the
+        # enrollment, so updated_at moves with them; the date is part of the
+        # key because projections start from today
+        version = pinned_version(enrollment)
+        name = (
+            f'calendar:{enrollment.pk}:{enrollment.updated_at.timestamp()}'
+            f':{timezone.localdate().isoformat()}'
+        )
+        data = get_or_build_document(
+            version.content_hash, name, lambda: build_calendar(enrollment, version),
+            timeout=settings.PROGRAM_CACHE_TIMEOUT
+        )
+
+        response = Response(data)
+        if request.accepted_renderer.format == 'ics':
+            response['Content-Disposition'] = f'attachment; filename="enrollment-{enrollment.pk}.ics"'
+        return response
 
 
 class EnrollInProgramView(APIView):
@@ -148,39 +448,71 @@ class EnrollInProgramView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Check if already enrolled
-        existing = UserEnrollment.objects.filter(
-            user=request.user,
-            program=program,
-            status='active'
-        ).exists()
-
-        if existing:
+        # The partial unique constraint rejects a second active enrollment,
+        # also when two requests race
+        try:
+            with transaction.atomic():
+                enrollment = UserEnrollment.objects.create(
+                    user=request.user,
+                    program=program,
+                    program_version=current_version(program),
+                    start_date=timezone.now().date()
+                )
+        except IntegrityError:
             return Response(
                 {'error': 'Already enrolled in this program'},
-                status=status.HTTP_400_BAD_REQUEST
+                status=status.HTTP_409_CONFLICT
             )
 
-        enrollment = UserEnrollment.objects.create(
-            user=request.user,
-            program=program,
-            start_date=timezone.now().date()
-        )
-
         return Response(
             UserEnrollmentSerializer(enrollment).data,
             status=status.HTTP_201_CREATED
         )
 
 
+class CohortEnrollView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def post(self, request, pk):
+        try:
+            program = WorkoutProgram.objects.get(pk=pk, is_active=True)
+        except WorkoutProgram.DoesNotExist:
+            return Response(
+                {'error': 'Program not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = CohortEnrollmentSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                report = enroll_cohort(
+                    program,
+                    max_users=CohortEnrollmentSerializer.MAX_USERS,
+                    **serializer.validated_data
+                )
+            except CohortTooLargeError:
+                return Response(
+                    {'error': f'More than {CohortEnrollmentSerializer.MAX_USERS} customers '
+                              'match. Narrow the filters.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return Response(report, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def pinned_enrollment(user):
+    """The user's active enrollment with its pinned version, in one query."""
+    return UserEnrollment.objects.filter(
+        user=user,
+        status='active'
+    ).select_related('program_version').defer('program_version__document').first()
+
+
 class CurrentProgramView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        enrollment = UserEnrollment.objects.filter(
-            user=request.user,
-            status='active'
-        ).select_related('program').first()
+        enrollment = pinned_enrollment(request.user)
 
         if not enrollment:
             return Response(
@@ -188,21 +520,36 @@ class CurrentProgramView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        program_data = WorkoutProgramSerializer(enrollment.program).data
-        return Response({
-            'enrollment': UserEnrollmentSerializer(enrollment).data,
-            'program': program_data
-        })
+        # Enrollments see the program as it was when they started
+        version = pinned_version(enrollment)
+        context = exercise_map_context(request)
+
+        def build():
+            document = version_document(version)
+            days, exercise_map = normalize_exercises(document['days'])
+            return {'program': {**document, 'days': days}, 'exercises': exercise_map}
+
+        # Versions leave out live values such as the enrollment count
+        live = live_fields(enrollment.program_id)
+        data = {
+            'enrollment': UserEnrollmentSerializer(
+                enrollment,
+                context={'program_header': {**version_header(version), **live}}
+            ).data,
+        }
+        if context:
+            data.update(get_or_build_document(version.content_hash, 'program:map', build))
+            data['program'] = {**data['program'], **live}
+        else:
+            data['program'] = {**version_document(version), **live}
+        return Response(data)
 
 
 class TodayWorkoutView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        enrollment = UserEnrollment.objects.filter(
-            user=request.user,
-            status='active'
-        ).select_related('program').first()
+        enrollment = pinned_enrollment(request.user)
 
         if not enrollment:
             return Response(
@@ -210,28 +557,50 @@ class TodayWorkoutView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Get today's workout day
-        try:
-            day = ProgramDay.objects.get(
-                program=enrollment.program,
-                week_number=enrollment.current_week,
-                day_number=enrollment.current_day
-            )
-        except ProgramDay.DoesNotExist:
+        version = pinned_version(enrollment)
+        week_number = enrollment.current_week
+        day_number = enrollment.current_day
+        context = exercise_map_context(request)
+
+        # Version documents never change, so the rendered day is cached for
+        # good and shared by everyone on the same version and day
+        def build():
+            document = version_document(version)
+            day_data = next((
+                day for day in document['days']
+                if day['week_number'] == week_number and day['day_number'] == day_number
+            ), None)
+            if day_data is None:
+                return {}
+
+            day_data = dict(day_data)
+            # Remove hardcoded weekday if present (e.g., "Monday - Workout 1" -> "Workout 1")
+            if ' - ' in day_data['day_name']:
+                day_data['day_name'] = day_data['day_name'].split(' - ')[1]
+
+            if not context:
+                return {'day': day_data}
+            days, exercise_map = normalize_exercises([day_data])
+            return {'day': days[0], 'exercises': exercise_map}
+
+        name = f'today:{week_number}:{day_number}'
+        if context:
+            name = f'{name}:map'
+        data = get_or_build_document(version.content_hash, name, build)
+        if not data:
             return Response(
                 {'message': 'No workout scheduled for today'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        day_data = ProgramDaySerializer(day).data
-        
-        # Remove hardcoded weekday if present (e.g., "Monday - Workout 1" -> "Workout 1")
-        if ' - ' in day_data['day_name']:
-            day_data['day_name'] = day_data['day_name'].split(' - ')[1]
-            
         return Response({
-            'enrollment': UserEnrollmentSerializer(enrollment).data,
-            'day': day_data
+            'enrollment': UserEnrollmentSerializer(
+                enrollment,
+                context={'program_header': {
+                    **version_header(version), **live_fields(enrollment.program_id)
+                }}
+            ).data,
+            **data
         })
 
 
@@ -246,7 +615,7 @@ class ProgramStatsView(APIView):
 
         # Most popular programs
         from django.db.models import Count
-        popular_programs = WorkoutProgram.objects.annotate(
+        popular_programs = WorkoutProgram.objects.with_enrollment_count().annotate(
             enrollment_count=Count('enrollments')
         ).order_by('-enrollment_count')[:5]
 
@@ -0,0 +1,148 @@
+"""
+Sparse fieldsets shared by the API apps.
+
+On GET requests ?fields=id,name keeps only the listed fields and
+?omit=description drops fields. Dotted names reach into nested serializers,
+e.g. ?fields=id,days.day_name,days.exercises.id. Serializers opt in with
+SparseFieldsetMixin; views opt in with SparseQuerysetMixin, which trims
+the queryset to the columns and relations the remaining fields read.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.serializers import ListSerializer
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def parse_fieldset(value):
+    """Turn 'a,b.c,b.d' into {'a': {}, 'b': {'c': {}, 'd': {}}}."""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def requested_fieldset(request):
+    """Return the (fields, omit) trees of a request, or None if it has none."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = request.query_params.get('fields')
+    omit = request.query_params.get('omit')
+    if fields is None and omit is None:
+        return None
+    return (
+        parse_fieldset(fields) if fields is not None else None,
+        parse_fieldset(omit or '')
+    )
+
+
+def fieldset_cache_name(request):
+    """Suffix for cached documents rendered with a sparse fieldset."""
+    if requested_fieldset(request) is None:
+        return ''
+    params = request.query_params
+    return f":fields={params.get('fields', '')}:omit={params.get('omit', '')}"
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that applies ?fields= / ?omit= to its fields.
+
+    The top-level serializer reads the request from the context and hands
+    each nested SparseFieldsetMixin serializer its part of the selection.
+    Dropped fields are never computed.
+    """
+    # Model lookups read by fields that are not plain model fields (method
+    # fields, properties), used by SparseQuerysetMixin. A rendered field
+    # that is in neither keeps the queryset untrimmed.
+    sparse_sources = {}
+
+    def get_sparse_fieldset(self):
+        if hasattr(self, '_sparse_fieldset'):
+            return self._sparse_fieldset
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return None, {}
+        return requested_fieldset(self.context.get('request')) or (None, {})
+
+    def get_fields(self):
+        fields = super().get_fields()
+        include, omit = self.get_sparse_fieldset()
+        for name in list(fields):
+            if (include is not None and name not in include) or omit.get(name) == {}:
+                del fields[name]
+                continue
+            nested = getattr(fields[name], 'child', fields[name])
+            if isinstance(nested, SparseFieldsetMixin):
+                nested._sparse_fieldset = (
+                    include.get(name) or None if include is not None else None,
+                    omit.get(name, {})
+                )
+        return fields
+
+
+def sparse_queryset(queryset, serializer, keep=()):
+    """
+    Limit `queryset` to what `serializer` renders: only() the columns read
+    by its fields and keep just the select_related / prefetch_related
+    lookups they use. Nested prefetch querysets are left as they are.
+    """
+    opts = queryset.model._meta
+    columns = {opts.pk.name, *keep}
+    relations = set()
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        sources = serializer.sparse_sources.get(name)
+        if sources is None:
+            if field.source == '*':
+                return queryset
+            sources = ['__'.join(field.source_attrs)]
+        for source in sources:
+            head, _, rest = source.partition('__')
+            try:
+                model_field = opts.get_field(head)
+            except FieldDoesNotExist:
+                return queryset
+            if model_field.is_relation and (rest or not model_field.concrete):
+                relations.add(head)
+            if model_field.concrete:
+                columns.add(head)
+
+    select_related = queryset.query.select_related
+    if isinstance(select_related, dict):
+        names = [name for name in select_related if name in relations]
+        # select_related() without names would follow every relation
+        queryset = queryset.select_related(None)
+        if names:
+            queryset = queryset.select_related(*names)
+    prefetches = [
+        lookup for lookup in queryset._prefetch_related_lookups
+        if (
+            lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+        ).split('__')[0] in relations
+    ]
+    return queryset.prefetch_related(None).prefetch_related(*prefetches).only(*columns)
+
+
+class SparseQuerysetMixin:
+    """
+    View mixin that trims the filtered queryset to the requested fieldset
+    of the view's serializer, see sparse_queryset().
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if requested_fieldset(self.request) is None:
+            return queryset
+        serializer = self.get_serializer()
+        if not isinstance(serializer, SparseFieldsetMixin):
+            return queryset
+        # Keyset cursors are built from these attributes
+        keep = [field.lstrip('-') for field in getattr(self, 'keyset_ordering', [])]
+        return sparse_queryset(queryset, serializer, keep=keep)
@@ -0,0 +1,169 @@
+"""
+Pagination classes shared by the API apps.
+"""
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts PostgreSQL planner statistics for big tables.
+
+    For an unfiltered queryset the count comes from pg_class.reltuples when
+    that estimate is at least ESTIMATED_COUNT_THRESHOLD rows. Filtered
+    querysets, small tables, tables that were never analyzed and other
+    databases get an exact COUNT(*).
+    """
+
+    def _estimated_count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is None or query.where or query.distinct or query.combinator:
+            return None
+        if query.group_by is not None or query.low_mark or query.high_mark is not None:
+            return None
+
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < settings.ESTIMATED_COUNT_THRESHOLD:
+            return None
+        return row[0]
+
+    @cached_property
+    def count(self):
+        estimate = self._estimated_count()
+        if estimate is not None:
+            return estimate
+        return super().count
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    django_paginator_class = EstimatedCountPaginator
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the view's `keyset_ordering` columns
+    plus `id` as a tiebreaker, e.g. `['-completed_at']`.
+
+    Each page is a single indexed range query with no OFFSET and no
+    COUNT(*); pass `?count=true` to include the total anyway. The cursor
+    ordering always wins over `?ordering=`.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def __init__(self):
+        self.page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+
+    def get_ordering(self, view):
+        ordering = list(getattr(view, 'keyset_ordering', ['-created_at']))
+        # Ties are broken by id in the direction of the last column
+        descending = ordering[-1].startswith('-')
+        return ordering + ['-id' if descending else 'id']
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, values):
+        raw = json.dumps(values, default=str).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound('Invalid cursor')
+        return values
+
+    def seek_filter(self, values):
+        """Rows strictly after `values` in the lexicographic key order."""
+        clauses = []
+        for index, term in enumerate(self.ordering):
+            field = term.lstrip('-')
+            lookup = 'lt' if term.startswith('-') else 'gt'
+            equal = {
+                self.ordering[i].lstrip('-'): values[i] for i in range(index)
+            }
+            clauses.append(Q(**equal, **{f'{field}__{lookup}': values[index]}))
+        return reduce(or_, clauses)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = queryset.count()
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.seek_filter(self.decode_cursor(cursor)))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        values = [getattr(last, term.lstrip('-')) for term in self.ordering]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            payload['count'] = self.count
+        return Response(payload)
+
+
+class OptInKeysetPagination(BasePagination):
+    """
+    Page-number pagination by default; switches to KeysetPagination when
+    the request carries a `cursor` parameter (`?cursor=` for the first page).
+    """
+    keyset_class = KeysetPagination
+    page_number_class = EstimatedCountPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.paginator = self.keyset_class()
+        else:
+            self.paginator = self.page_number_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
@@ -86,6 +86,48 @@ if match:
         }
     }
 
+# Cache - local memory by default, or file-based so that several worker
+# processes share program document versions without an external service
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'fitlife',
+        }
+    }
+
+# Seconds a cached program document is kept (versioned keys handle invalidation).
+# A version bump only reaches the process that made the edit when the cache
+# is local memory, so other workers are kept stale for a minute at most
+PROGRAM_CACHE_TIMEOUT = int(os.getenv(
+    'PROGRAM_CACHE_TIMEOUT',
+    str(60 * 60 * 24) if CACHE_BACKEND == 'file' else '60'
+))
+
+# Seconds a user's cached progress stats are kept (versioned keys handle
+# invalidation). As with programs, bumps stay in one process with locmem
+STATS_CACHE_TIMEOUT = int(os.getenv(
+    'STATS_CACHE_TIMEOUT',
+    str(60 * 60 * 24) if CACHE_BACKEND == 'file' else '60'
+))
+
+# Seconds before the in-process exercise autocomplete index is rebuilt
+EXERCISE_SUGGEST_TTL = int(os.getenv('EXERCISE_SUGGEST_TTL', '300'))
+
+# Enrollment maintenance (manage.py maintain_enrollments): active enrollments
+# without a workout for this many days are paused, and paused ones idle for
+# the second period are cancelled
+ENROLLMENT_STALE_DAYS = int(os.getenv('ENROLLMENT_STALE_DAYS', '14'))
+ENROLLMENT_EXPIRE_DAYS = int(os.getenv('ENROLLMENT_EXPIRE_DAYS', '90'))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -131,6 +173,10 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Unfiltered tables estimated above this many rows are paginated with the
+# PostgreSQL planner estimate instead of an exact COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ESTIMATED_COUNT_THRESHOLD', '100000'))
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
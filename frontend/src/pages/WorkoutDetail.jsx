@@ -24,11 +24,21 @@ const WorkoutDetail = () => {
   const [loading, setLoading] = useState(true);
   const [enrolling, setEnrolling] = useState(false);
   const [expandedWeek, setExpandedWeek] = useState(1);
+  // Loaded weeks keyed by `${id}:${week}`, so a late response for the
+  // previous program never shows up under this one
+  const [weekDays, setWeekDays] = useState({});
+  const weekKey = (weekNumber) => `${id}:${weekNumber}`;
 
   useEffect(() => {
     fetchProgram();
   }, [id]);
 
+  useEffect(() => {
+    if (expandedWeek && !weekDays[weekKey(expandedWeek)]) {
+      fetchWeek(expandedWeek);
+    }
+  }, [id, expandedWeek]);
+
   const fetchProgram = async () => {
     try {
       const response = await programsAPI.get(id);
@@ -40,6 +50,15 @@ const WorkoutDetail = () => {
     }
   };
 
+  const fetchWeek = async (weekNumber) => {
+    try {
+      const response = await programsAPI.week(id, weekNumber);
+      setWeekDays((prev) => ({ ...prev, [weekKey(weekNumber)]: response.data.days }));
+    } catch (error) {
+      console.error('Error fetching week:', error);
+    }
+  };
+
   const handleEnroll = async () => {
     if (!isAuthenticated) {
       navigate('/login', { state: { from: { pathname: `/workout/${id}` } } });
@@ -57,15 +76,13 @@ const WorkoutDetail = () => {
     }
   };
 
-  const groupDaysByWeek = (days) => {
-    const weeks = {};
-    days?.forEach((day) => {
-      if (!weeks[day.week_number]) {
-        weeks[day.week_number] = [];
-      }
-      weeks[day.week_number].push(day);
+  // The program only carries a week outline; full days are loaded per week
+  const groupDaysByWeek = (weeks) => {
+    const grouped = {};
+    weeks?.forEach((week) => {
+      grouped[week.week_number] = weekDays[weekKey(week.week_number)] || week.days;
     });
-    return weeks;
+    return grouped;
   };
 
   if (loading) {
@@ -84,7 +101,7 @@ const WorkoutDetail = () => {
     );
   }
 
-  const weeklyDays = groupDaysByWeek(program.days);
+  const weeklyDays = groupDaysByWeek(program.weeks);
 
   const goalLabels = {
     weight_loss: 'Weight Loss',
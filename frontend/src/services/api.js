@@ -95,6 +95,7 @@ export const exercisesAPI = {
 export const programsAPI = {
   list: (params) => api.get('/programs/', { params }),
   get: (id) => api.get(`/programs/${id}/`),
+  week: (id, week) => api.get(`/programs/${id}/weeks/${week}/`),
   create: (data) => api.post('/programs/', data),
   update: (id, data) => api.put(`/programs/${id}/`, data),
   delete: (id) => api.delete(`/programs/${id}/`),